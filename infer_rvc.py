@@ -2,6 +2,8 @@ import subprocess
 import os
 import json
 import glob
+import re
+from collections import OrderedDict
 from tqdm import tqdm
 
 # def infer_rvc(f0up_key: int, input_path: str, index_path: str, f0method: str, opt_path: str, model_path: str, index_rate: float, 
@@ -14,13 +16,13 @@ from tqdm import tqdm
 #     subprocess.run(cmd)
 
 # Example main(0, input.wav, model.index, model.pth, output.wav)
-def infer_rvc(f0up_key,input_path,index_path,model_path,opt_path):
+def infer_rvc(f0up_key,input_path,index_path,model_path,opt_path,backend="torch",quantize=False,
+              resample_sr=0,bitrate=None):
     f0method = "rmvpe"
     index_rate = 0.5
     device = "cuda:0"
     is_half = True
     filter_radius = 3
-    resample_sr = 0
     rms_mix_rate = 1
     protect = 0.33
     crepe_hop_length = 128
@@ -31,33 +33,138 @@ def infer_rvc(f0up_key,input_path,index_path,model_path,opt_path):
     cmd = ['venv/scripts/python', 'libs/rvc/test_infer.py', 
            str(f0up_key), input_path, index_path, f0method, opt_path, model_path, str(index_rate), device, 
            str(is_half), str(filter_radius), str(resample_sr), str(rms_mix_rate), str(protect), str(crepe_hop_length), 
-           str(f0_minimum), str(f0_maximum), str(autotune_enable)]
+           str(f0_minimum), str(f0_maximum), str(autotune_enable), backend, str(quantize),
+           "auto", str(bitrate or "auto")]
     subprocess.run(cmd)
 
 from tqdm import tqdm
 
-def infer_files(input_dir,config_path):
+def run_rvc_jobs(jobs, jobs_path, device="cuda:0", is_half=True, max_models=4, ram_budget=None, wait=True,
+                 worker=0, workers=1):
+    # Один процесс на весь пакет: модели остаются в памяти (libs/rvc/model_pool.py).
+    # Процесс worker из workers сам берёт свою долю RAM и, если считает на CPU, ядер
+    settings = {"jobs": jobs, "device": device, "is_half": is_half,
+                "max_models": max_models, "ram_budget": ram_budget,
+                "worker": worker, "workers": workers}
+    with open(jobs_path, 'w', encoding='utf-8') as f:
+        json.dump(settings, f, ensure_ascii=False, indent=1)
+    proc = subprocess.Popen(['venv/scripts/python', 'libs/rvc/model_pool.py', jobs_path])
+    if wait:
+        proc.wait()
+        os.remove(jobs_path)
+    return proc
+
+def parse_line_name(file_name):
+    # "12_Patrick" -> (12, "Patrick"), имена из split_dialogues; иначе None
+    match = re.match(r'^(\d+)_(.+)$', file_name)
+    if match is None:
+        return None
+    return int(match.group(1)), match.group(2)
+
+def resample_rate(character_config):
+    # Пайплайн пересэмплирует только в частоты >= 16000, 0 - частота модели
+    sample_rate = int(character_config.get('sample_rate', 0) or 0)
+    return sample_rate if sample_rate >= 16000 else 0
+
+def check_sample_rate(character, character_config):
+    sample_rate = int(character_config.get('sample_rate', 0) or 0)
+    if 0 < sample_rate < 16000:
+        print(f"sample_rate {sample_rate} for {character} is below 16000 Hz, using the model's rate")
+
+def plan_jobs(input_dir, config, output_dir):
+    """Один проход по файлам: {персонаж: [задания по порядку реплик]}.
+
+    Персонаж ищется по точному имени (split_dialogues заменяет пробелы на _),
+    поэтому "Pat" больше не совпадает с "Patrick".
+    """
+    character_index = {character.replace(" ", "_"): character for character in config}
+    lines = []
+    for file in glob.glob(os.path.join(input_dir, '*')):
+        file_name = os.path.splitext(os.path.basename(file))[0]
+        parsed = parse_line_name(file_name)
+        character = character_index.get(parsed[1]) if parsed else None
+        if character is None:
+            print(f"No character for file {file}, skipping")
+            continue
+        lines.append((parsed[0], character, file, file_name))
+
+    plan = OrderedDict()
+    for idx, character, file, file_name in sorted(lines):
+        character_config = config[character]
+        if character not in plan:
+            check_sample_rate(character, character_config)
+        # Формат выхода (wav, flac, ogg, opus, mp3), битрейт ("96k") и частота для каждого персонажа
+        output_format = character_config.get('format', 'mp3')
+        plan.setdefault(character, []).append({
+            "input_path": file,
+            "opt_path": os.path.join(output_dir, f'{file_name}.{output_format}'),
+            "model_path": character_config['model_path'],
+            "index_path": character_config['model_index'],
+            "f0up_key": character_config['pitch'],
+            "resample_sr": resample_rate(character_config),
+            "bitrate": character_config.get('bitrate'),
+            "backend": character_config.get('backend', 'torch'),
+            "quantize": character_config.get('quantize', False),
+        })
+    return plan
+
+def locality_groups(plan, config):
+    # Персонажи с одной моделью (и одним backend) - одна группа, группы в порядке первой реплики
+    groups = OrderedDict()
+    for character in plan:
+        character_config = config[character]
+        key = (character_config.get('backend', 'torch'), character_config.get('quantize', False),
+               character_config['model_path'])
+        groups.setdefault(key, []).append(character)
+    return list(groups.values())
+
+def split_plan(plan, groups, parallel):
+    # Группы целиком раздаются исполнителям, больше аудио (байт входа) - раньше (жадно);
+    # внутри исполнителя сохраняется порядок локальности
+    def weight(group):
+        return sum(os.path.getsize(job["input_path"]) for c in group for job in plan[c])
+
+    buckets = [[] for _ in range(max(1, parallel))]
+    sizes = [0] * len(buckets)
+    for group in sorted(groups, key=weight, reverse=True):
+        k = sizes.index(min(sizes))
+        buckets[k].append(group)
+        sizes[k] += weight(group)
+    return [[c for group in groups if group in bucket for c in group] for bucket in buckets if bucket]
+
+def infer_files(input_dir,config_path,pooled=True,max_models=4,ram_budget=None,parallel=1,
+                device="cuda:0",is_half=True):
     # Загрузка конфигурации
     with open(config_path, 'r') as f:
         config = json.load(f)
 
-    # Получение списка всех файлов в input_dir
-    files = glob.glob(os.path.join(input_dir, '*'))
-
     # Проверка существования директории output и создание ее, если необходимо
     output_dir = os.path.join(input_dir, '../output')
     os.makedirs(output_dir, exist_ok=True)
 
-    # Обработка каждого файла
-    for file in tqdm(files, desc="Processing files"):
-        file_name = os.path.splitext(os.path.basename(file))[0]
-        for character, character_config in config.items():
-            if character in file_name:
-                model_path = character_config['model_path']
-                model_index = character_config['model_index']
-                f0up_key = character_config['pitch']
-                opt_path = os.path.join(output_dir, f'{file_name}.mp3')
+    plan = plan_jobs(input_dir, config, output_dir)
+    groups = locality_groups(plan, config)
+    order = [character for group in groups for character in group]
+    print("RVC plan: " + ", ".join(f"{character} x{len(plan[character])}" for character in order))
 
-                infer_rvc(f0up_key, file, model_index, model_path, opt_path)
-                break  # Если мы нашли соответствующего персонажа, прерываем цикл
+    if not pooled:
+        for character in tqdm(order, desc="Processing characters"):
+            for job in plan[character]:
+                infer_rvc(job["f0up_key"], job["input_path"], job["index_path"], job["model_path"],
+                          job["opt_path"], job["backend"], job["quantize"], job["resample_sr"], job["bitrate"])
+        return plan
 
+    # parallel процессов, у каждого свой набор персонажей и свой пул моделей;
+    # на CPU у каждого ещё и своя доля ядер. Пути выходных файлов от этого не зависят
+    buckets = split_plan(plan, groups, parallel)
+    procs = []
+    for k, characters in enumerate(buckets):
+        jobs = [job for character in characters for job in plan[character]]
+        jobs_path = os.path.join(input_dir, f'../rvc_jobs_{k}.json')
+        procs.append((jobs_path, run_rvc_jobs(jobs, jobs_path, device=device, is_half=is_half,
+                                              max_models=max_models, ram_budget=ram_budget, wait=False,
+                                              worker=k, workers=len(buckets))))
+    for jobs_path, proc in procs:
+        proc.wait()
+        os.remove(jobs_path)
+    return plan
@@ -0,0 +1,220 @@
+"""
+In-process audio decoding and encoding.
+
+read_audio() decodes anything libsndfile reads (PCM WAV, FLAC, OGG) in
+this process, block by block, and resamples each block with a polyphase
+filter; other formats fall back to one ffmpeg process, counted in
+decode_stats.
+
+write_audio() encodes int16 or float frames through libsndfile (soundfile)
+when it supports the format, which covers WAV/FLAC/OGG Vorbis and, with
+libsndfile >= 1.1, MP3 and Opus; int16 goes in as is. A fixed bitrate, or
+a format libsndfile lacks, is piped to one ffmpeg process per file: raw
+PCM goes in on stdin, no temporary WAV is written and no shell is
+involved.
+"""
+import io
+import os
+import subprocess
+from fractions import Fraction
+
+import numpy as np
+import soundfile as sf
+
+# extension -> (libsndfile container, subtype)
+SOUNDFILE_FORMATS = {
+    "wav": ("WAV", "PCM_16"),
+    "flac": ("FLAC", "PCM_16"),
+    "ogg": ("OGG", "VORBIS"),
+    "opus": ("OGG", "OPUS"),
+    "mp3": ("MP3", "MPEG_LAYER_III"),
+}
+
+decode_stats = {"inprocess": 0, "ffmpeg": 0, "ffprobe": 0}
+encode_stats = {"inprocess": 0, "ffmpeg": 0}
+
+# sample rates the Opus and MPEG layer III encoders accept; other rates
+# (e.g. 40 kHz RVC models) are resampled to 48 kHz
+ENCODER_RATES = {
+    "opus": (48000, 24000, 16000, 12000, 8000),
+    "mp3": (48000, 44100, 32000, 24000, 22050, 16000, 12000, 11025, 8000),
+}
+
+
+def resample(audio, orig_sr, target_sr):
+    """Polyphase resampling along the first axis (48k -> 16k is a plain 1/3 decimation)."""
+    if orig_sr == target_sr:
+        return audio
+    from scipy.signal import resample_poly
+
+    ratio = Fraction(int(target_sr), int(orig_sr))
+    return resample_poly(audio, ratio.numerator, ratio.denominator, axis=0).astype(np.float32)
+
+
+def resample_blocks(blocks, orig_sr, target_sr):
+    """resample() over an iterator of 1-D blocks, yielding the output piece by piece.
+
+    Each piece is cut from a pass over the block plus enough context on
+    both sides for resample_poly's filter, and pieces start at multiples of
+    down input samples, so the concatenation equals one resample() over
+    the whole signal while only a block and its context are held.
+    """
+    from scipy.signal import resample_poly
+
+    ratio = Fraction(int(target_sr), int(orig_sr))
+    up, down = ratio.numerator, ratio.denominator
+    # the filter spans 10 * max(up, down) taps each side at the upsampled rate
+    context = -(-(10 * max(up, down) // up + 1) // down) * down
+    history = np.zeros(0, np.float32)  # input before pending, at most context long
+    pending = np.zeros(0, np.float32)  # input not emitted yet, starts at a multiple of down
+    for block in blocks:
+        pending = np.concatenate([pending, block])
+        ready = (len(pending) - context) // down * down
+        if ready <= 0:
+            continue
+        y = resample_poly(np.concatenate([history, pending[: ready + context]]), up, down)
+        skip = len(history) * up // down
+        yield y[skip : skip + ready * up // down].astype(np.float32)
+        history = np.concatenate([history, pending[:ready]])[-context:]
+        pending = pending[ready:]
+    y = resample_poly(np.concatenate([history, pending]), up, down)
+    yield y[len(history) * up // down :].astype(np.float32)
+
+
+def ffmpeg_decode(file, sr):
+    import ffmpeg
+
+    decode_stats["ffmpeg"] += 1
+    out, _ = (
+        ffmpeg.input(file, threads=0)
+        .output("-", format="f32le", acodec="pcm_f32le", ac=1, ar=sr)
+        .run(cmd=["ffmpeg", "-nostdin"], capture_stdout=True, capture_stderr=True)
+    )
+    return np.frombuffer(out, np.float32).flatten()
+
+
+def read_audio(file, sr, block_seconds=30):
+    """Mono float32 at sr, like ffmpeg -ac 1 -ar sr -f f32le.
+
+    Decoded, downmixed and resampled block_seconds at a time, so a long
+    stereo 48 kHz file never sits in memory at its source rate.
+    """
+    try:
+        f = sf.SoundFile(file)
+    except RuntimeError:  # format libsndfile can't decode (mp3 on old builds, m4a, ...)
+        return ffmpeg_decode(file, sr)
+    decode_stats["inprocess"] += 1
+    with f:
+        blocks = (
+            block.mean(axis=1) if block.shape[1] > 1 else block[:, 0]
+            for block in f.blocks(
+                blocksize=int(block_seconds * f.samplerate), dtype="float32", always_2d=True
+            )
+        )
+        if f.samplerate == sr:
+            pieces = list(blocks)
+        else:
+            pieces = list(resample_blocks(blocks, f.samplerate, sr))
+    if not pieces:
+        return np.zeros(0, np.float32)
+    return np.ascontiguousarray(np.concatenate(pieces), np.float32)
+
+
+def audio_duration(file):
+    """Duration in seconds from the file header; ffprobe only for other formats."""
+    try:
+        return sf.info(file).duration
+    except RuntimeError:
+        import ffmpeg
+
+        decode_stats["ffprobe"] += 1
+        return float(ffmpeg.probe(file)["streams"][0]["duration"])
+
+
+def soundfile_supports(format):
+    if format not in SOUNDFILE_FORMATS:
+        return False
+    container, subtype = SOUNDFILE_FORMATS[format]
+    return container in sf.available_formats() and subtype in sf.available_subtypes(container)
+
+
+def as_frames(wave):
+    """[T] or [T, C] frames; channel-first [C, T] input (C <= 2) is transposed.
+
+    int16 is kept as is, anything else becomes float32 clipped to -1..1.
+    """
+    wave = np.asarray(wave)
+    if wave.ndim == 2 and wave.shape[0] <= 2 < wave.shape[1]:
+        wave = wave.T
+    if wave.dtype == np.int16:
+        return wave
+    return np.clip(wave.astype(np.float32), -1.0, 1.0)
+
+
+def ffmpeg_encode(wave, sr, format, target=None, quality="2", bitrate=None):
+    """Encode via one ffmpeg process fed from a pipe. Returns bytes if target is None."""
+    channels = 1 if wave.ndim == 1 else wave.shape[1]
+    output = target if target is not None else "pipe:1"
+    pcm = "s16le" if wave.dtype == np.int16 else "f32le"
+    cmd = [
+        "ffmpeg", "-nostdin", "-loglevel", "error", "-y",
+        "-f", pcm, "-ar", str(sr), "-ac", str(channels), "-i", "pipe:0",
+        "-vn",
+    ]
+    cmd += ["-b:a", str(bitrate)] if bitrate else ["-q:a", quality]
+    if target is None:
+        cmd += ["-f", format]
+    encode_stats["ffmpeg"] += 1
+    proc = subprocess.run(
+        cmd + [output],
+        input=np.ascontiguousarray(wave).tobytes(),
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError("ffmpeg failed: %s" % proc.stderr.decode(errors="ignore"))
+    return proc.stdout if target is None else target
+
+
+def write_audio(target, wave, sr, format=None, bitrate=None):
+    """Write wave (int16, or float in -1..1) to a path or a binary file object.
+
+    format defaults to the path's extension. bitrate ("96k") applies to
+    the lossy formats and is encoded by ffmpeg. Opus/MP3 input at a rate
+    the encoder does not take is resampled to 48 kHz first, and ffmpeg
+    takes over if libsndfile still refuses the data.
+    """
+    if format is None:
+        format = os.path.splitext(target)[1][1:] if isinstance(target, str) else "wav"
+    format = format.lower()
+    wave = as_frames(wave)
+    if format in ENCODER_RATES and sr not in ENCODER_RATES[format]:
+        if wave.dtype == np.int16:
+            wave = wave.astype(np.float32) / 32768
+        wave, sr = as_frames(resample(wave, sr, 48000)), 48000
+    lossless = format in ("wav", "flac")
+    if soundfile_supports(format) and (lossless or not bitrate):
+        container, subtype = SOUNDFILE_FORMATS[format]
+        start = None if isinstance(target, str) else target.tell()
+        try:
+            sf.write(target, wave, sr, format=container, subtype=subtype)
+            encode_stats["inprocess"] += 1
+            return target
+        except RuntimeError:  # LibsndfileError: encoder rejected the data
+            if lossless:
+                raise
+            if start is not None:
+                target.seek(start)
+                target.truncate()
+    if isinstance(target, str):
+        ffmpeg_encode(wave, sr, format, target, bitrate=bitrate)
+    else:
+        target.write(ffmpeg_encode(wave, sr, format, bitrate=bitrate))
+    return target
+
+
+def encode_audio(wave, sr, format="wav", bitrate=None):
+    """Encoded file contents as bytes."""
+    buffer = io.BytesIO()
+    write_audio(buffer, wave, sr, format, bitrate)
+    return buffer.getvalue()
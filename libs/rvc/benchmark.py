@@ -0,0 +1,1090 @@
+"""
+CPU benchmarks for the stage-3 RVC pipeline.
+
+python libs/rvc/benchmark.py world_f0 --audio some.wav --method harvest --workers 1 2 4 8
+"""
+import os, sys
+import argparse
+from time import time as ttime
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+
+def load_or_synth(path, sr, seconds):
+    if path:
+        from my_utils import load_audio
+
+        return load_audio(path, sr)
+    # Vibrato tone with pauses so that splitting has quiet points to find
+    t = np.arange(int(sr * seconds)) / sr
+    f0 = 150 + 30 * np.sin(2 * np.pi * 0.5 * t)
+    audio = 0.3 * np.sin(2 * np.pi * np.cumsum(f0) / sr)
+    audio *= (np.sin(2 * np.pi * 0.1 * t) > -0.8).astype(np.float64)
+    return (audio + 0.001 * np.random.randn(len(audio))).astype(np.float32)
+
+
+def current_rss():
+    """Resident set size of this process in bytes."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        import psutil
+
+        return psutil.Process().memory_info().rss
+
+
+def peak_rss_during(fn, interval=0.02):
+    """Run fn() while sampling RSS from a thread. Returns (result, seconds, peak growth in bytes)."""
+    import threading
+
+    base = current_rss()
+    peak = [base]
+    done = threading.Event()
+
+    def sample():
+        while not done.is_set():
+            peak[0] = max(peak[0], current_rss())
+            done.wait(interval)
+
+    sampler = threading.Thread(target=sample, daemon=True)
+    sampler.start()
+    t0 = ttime()
+    try:
+        result = fn()
+    finally:
+        elapsed = ttime() - t0
+        done.set()
+        sampler.join()
+    return result, elapsed, max(peak[0], current_rss()) - base
+
+
+def serialized_size(model):
+    import io
+    import torch
+
+    buffer = io.BytesIO()
+    torch.save(model.state_dict(), buffer)
+    return buffer.tell()
+
+
+def log_mel_distance(reference, estimate, sr):
+    """Mean absolute log-mel difference (dB) between two waveforms."""
+    import librosa
+
+    n = min(len(reference), len(estimate))
+    mels = [
+        librosa.power_to_db(librosa.feature.melspectrogram(y=y[:n].astype(np.float32), sr=sr, n_mels=80))
+        for y in (reference, estimate)
+    ]
+    return float(np.mean(np.abs(mels[0] - mels[1])))
+
+
+def f0_error(reference, estimate):
+    """Voicing agreement and RMS cents error over frames voiced in both."""
+    n = min(len(reference), len(estimate))
+    reference, estimate = reference[:n], estimate[:n]
+    both = (reference > 0) & (estimate > 0)
+    agreement = float(np.mean((reference > 0) == (estimate > 0)))
+    cents = 1200 * np.log2(estimate[both] / reference[both]) if both.any() else np.zeros(1)
+    return agreement, float(np.sqrt(np.mean(np.square(cents))))
+
+
+def bench_world_f0(args):
+    from world_f0 import world_f0, segmented_world_f0
+
+    x = load_or_synth(args.audio, 16000, args.seconds).astype(np.double)
+    print(f"audio: {len(x) / 16000:.1f}s")
+    t0 = ttime()
+    reference = world_f0(x, 16000, args.method, args.f0_min, args.f0_max)
+    single = ttime() - t0
+    print(f"single pass: {single:.2f}s")
+    for workers in args.workers:
+        t0 = ttime()
+        f0 = segmented_world_f0(
+            x,
+            16000,
+            args.method,
+            args.f0_min,
+            args.f0_max,
+            n_workers=workers,
+            segment_seconds=args.segment,
+            verbose=False,
+        )
+        elapsed = ttime() - t0
+        agreement, rms_cents = f0_error(reference, f0)
+        print(
+            f"workers={workers:<3} {elapsed:7.2f}s  speedup {single / elapsed:5.2f}x  "
+            f"voicing agreement {agreement:.4f}  rms error {rms_cents:.2f} cents"
+        )
+
+
+def legacy_sine_gen(gen, f0, upp):
+    """SineGen.forward before the frame-rate phase rework, kept for comparison."""
+    import torch
+    import torch.nn.functional as F
+
+    with torch.no_grad():
+        f0 = f0[:, None].transpose(1, 2)
+        f0_buf = torch.zeros(f0.shape[0], f0.shape[1], gen.dim, device=f0.device)
+        f0_buf[:, :, 0] = f0[:, :, 0]
+        for idx in np.arange(gen.harmonic_num):
+            f0_buf[:, :, idx + 1] = f0_buf[:, :, 0] * (idx + 2)
+        rad_values = (f0_buf / gen.sampling_rate) % 1
+        rand_ini = torch.rand(f0_buf.shape[0], f0_buf.shape[2], device=f0_buf.device)
+        rand_ini[:, 0] = 0
+        rad_values[:, 0, :] = rad_values[:, 0, :] + rand_ini
+        tmp_over_one = torch.cumsum(rad_values, 1)
+        tmp_over_one *= upp
+        tmp_over_one = F.interpolate(
+            tmp_over_one.transpose(2, 1), scale_factor=upp, mode="linear", align_corners=True
+        ).transpose(2, 1)
+        rad_values = F.interpolate(
+            rad_values.transpose(2, 1), scale_factor=upp, mode="nearest"
+        ).transpose(2, 1)
+        tmp_over_one %= 1
+        tmp_over_one_idx = (tmp_over_one[:, 1:, :] - tmp_over_one[:, :-1, :]) < 0
+        cumsum_shift = torch.zeros_like(rad_values)
+        cumsum_shift[:, 1:, :] = tmp_over_one_idx * -1.0
+        sine_waves = torch.sin(torch.cumsum(rad_values + cumsum_shift, dim=1) * 2 * np.pi)
+        sine_waves = sine_waves * gen.sine_amp
+        uv = gen._f02uv(f0)
+        uv = F.interpolate(uv.transpose(2, 1), scale_factor=upp, mode="nearest").transpose(2, 1)
+        noise_amp = uv * gen.noise_std + (1 - uv) * gen.sine_amp / 3
+        noise = noise_amp * torch.randn_like(sine_waves)
+        sine_waves = sine_waves * uv + noise
+    return sine_waves, uv, noise
+
+
+def profile_cpu(fn, repeats):
+    """Mean wall time and peak/total bytes allocated by torch on CPU for one call."""
+    from torch.profiler import profile, ProfilerActivity
+
+    fn()
+    t0 = ttime()
+    for _ in range(repeats):
+        fn()
+    elapsed = (ttime() - t0) / repeats
+    with profile(activities=[ProfilerActivity.CPU], profile_memory=True) as prof:
+        fn()
+    current = peak = allocated = 0
+    for event in prof.events():
+        current += event.cpu_memory_usage
+        peak = max(peak, current)
+        allocated += max(event.cpu_memory_usage, 0)
+    return elapsed, peak, allocated
+
+
+def bench_sinegen(args):
+    import torch
+    from infer_pack.models import SineGen
+
+    torch.set_num_threads(args.threads)
+    upp = args.sr // 100
+    frames = int(args.seconds * 100)
+    t = torch.arange(frames) / 100.0
+    f0 = (150 + 30 * torch.sin(2 * np.pi * 0.5 * t)) * (torch.sin(2 * np.pi * 0.2 * t) > -0.5)
+    f0 = f0[None].float()
+    gen = SineGen(args.sr, harmonic_num=args.harmonics)
+
+    # Voiced samples are deterministic apart from the additive noise, so compare
+    # them with noise disabled; unvoiced samples are pure noise of std sine_amp/3
+    gen.noise_std = 0
+    torch.manual_seed(0)
+    new, uv, _ = gen(f0, upp)
+    old, _, _ = legacy_sine_gen(gen, f0, upp)
+    voiced = uv[0, :, 0] > 0
+    diff = (new[0, voiced, 0] - old[0, voiced, 0]).abs().max().item()
+    print(
+        f"voiced max abs diff {diff:.2e}, unvoiced std new {new[0, ~voiced, 0].std():.4f} "
+        f"old {old[0, ~voiced, 0].std():.4f} expected {gen.sine_amp / 3:.4f}"
+    )
+    gen.noise_std = 0.003
+
+    for name, fn in (("legacy", lambda: legacy_sine_gen(gen, f0, upp)), ("fused", lambda: gen(f0, upp))):
+        elapsed, peak, allocated = profile_cpu(fn, args.repeats)
+        print(
+            f"{name:<7} {elapsed / args.seconds * 1000:7.3f} ms/s audio  "
+            f"peak {peak / args.seconds / 2**20:7.2f} MiB/s audio  "
+            f"allocated {allocated / args.seconds / 2**20:7.2f} MiB/s audio"
+        )
+
+
+def synth_inputs(net_g, cpt, seconds):
+    """Random HuBERT features / pitch for one chunk of `seconds` at 100 frames/s."""
+    import torch
+
+    frames = int(seconds * 100)
+    feats = torch.randn(1, frames, 256 if cpt.get("version", "v1") == "v1" else 768)
+    lengths = torch.tensor([frames]).long()
+    sid = torch.tensor([0]).long()
+    if cpt.get("f0", 1) == 1:
+        pitchf = torch.full((1, frames), 150.0)
+        pitch = torch.full((1, frames), 50).long()
+        return (feats, lengths, pitch, pitchf, sid)
+    return (feats, lengths, sid)
+
+
+def time_synth(net_g, inputs, repeats):
+    import torch
+
+    with torch.no_grad():
+        net_g.infer(*inputs)
+        t0 = ttime()
+        for _ in range(repeats):
+            net_g.infer(*inputs)
+    return (ttime() - t0) / repeats
+
+
+def bench_synth_pack(args):
+    import torch
+    from synth_pack import build_synthesizer, load_synthesizer, pack_synthesizer
+
+    torch.set_num_threads(args.threads)
+    packed_path = args.packed or os.path.splitext(args.model)[0] + ".infer.pth"
+    if not os.path.exists(packed_path):
+        pack_synthesizer(args.model, packed_path, half=args.half)
+
+    t0 = ttime()
+    cpt = torch.load(args.model, map_location="cpu")
+    raw = build_synthesizer(cpt, is_half=False)
+    raw.load_state_dict(cpt["weight"], strict=False)
+    raw.eval()
+    raw_load = ttime() - t0
+
+    t0 = ttime()
+    packed, _ = load_synthesizer(packed_path, "cpu", is_half=False)
+    packed_load = ttime() - t0
+
+    inputs = synth_inputs(raw, cpt, args.chunk)
+    raw_time = time_synth(raw, inputs, args.repeats)
+    packed_time = time_synth(packed, inputs, args.repeats)
+    print(f"size  raw {os.path.getsize(args.model) / 2**20:7.1f} MB  packed {os.path.getsize(packed_path) / 2**20:7.1f} MB")
+    print(f"load  raw {raw_load:7.3f} s   packed {packed_load:7.3f} s")
+    print(f"synth raw {raw_time:7.3f} s   packed {packed_time:7.3f} s  per {args.chunk:.0f}s chunk")
+
+
+def bench_onnx(args):
+    """ONNX Runtime vs PyTorch on CPU for HuBERT and the synthesizer, per chunk."""
+    import torch
+    from fairseq import checkpoint_utils
+    from onnx_export import ensure_exported
+    from infer_pack.onnx_inference import OnnxHubert, OnnxSynthesizer
+    from synth_pack import load_synthesizer
+
+    torch.set_num_threads(args.threads)
+    net_g, cpt = load_synthesizer(args.model, "cpu", is_half=False)
+    version = cpt.get("version", "v1")
+    onnx_synth = OnnxSynthesizer(
+        ensure_exported("synth", args.model, os.path.splitext(args.model)[0] + ".onnx")
+    )
+    models, _, _ = checkpoint_utils.load_model_ensemble_and_task([args.hubert], suffix="")
+    hubert = models[0].float().eval()
+    onnx_hubert = OnnxHubert(
+        ensure_exported(
+            "hubert", args.hubert, os.path.splitext(args.hubert)[0] + "_%s.onnx" % version, version=version
+        )
+    )
+
+    audio = torch.from_numpy(load_or_synth(args.audio, 16000, args.chunk)).float().view(1, -1)
+    layer = 9 if version == "v1" else 12
+
+    def torch_hubert():
+        with torch.no_grad():
+            feats = hubert.extract_features(source=audio, padding_mask=None, output_layer=layer)[0]
+            return hubert.final_proj(feats) if version == "v1" else feats
+
+    def ort_hubert():
+        return onnx_hubert.extract_features(audio, output_layer=layer)[0]
+
+    def torch_synth():
+        with torch.no_grad():
+            return net_g.infer(*inputs)
+
+    feats = torch_hubert()
+    diff = (feats - ort_hubert()[:, : feats.shape[1]]).abs().max().item()
+    inputs = synth_inputs(net_g, cpt, args.chunk)
+    rows = (
+        ("hubert torch", torch_hubert),
+        ("hubert onnx", ort_hubert),
+        ("synth torch", torch_synth),
+        ("synth onnx", lambda: onnx_synth.infer(*inputs)),
+    )
+    print(f"hubert max abs diff torch vs onnx: {diff:.2e}")
+    for name, fn in rows:
+        fn()
+        t0 = ttime()
+        for _ in range(args.repeats):
+            fn()
+        print(f"{name:<13} {(ttime() - t0) / args.repeats:7.3f} s per {args.chunk:.0f}s chunk")
+
+
+def bench_quantize(args):
+    """Quality, speed and memory of dynamic int8 versus fp32 on CPU."""
+    import copy
+    import torch
+    import librosa
+    from fairseq import checkpoint_utils
+    from rmvpe import RMVPE
+    from synth_pack import load_synthesizer
+    from quantize import quantize_hubert, quantize_synthesizer
+
+    torch.set_num_threads(args.threads)
+    audio = load_or_synth(args.audio, 16000, args.seconds)
+
+    def timed(fn):
+        fn()
+        t0 = ttime()
+        for _ in range(args.repeats):
+            out = fn()
+        return out, (ttime() - t0) / args.repeats
+
+    def report(name, fp32_time, int8_time, fp32_model, int8_model, extra):
+        print(
+            f"{name:<7} fp32 {fp32_time:7.3f}s  int8 {int8_time:7.3f}s  "
+            f"speedup {fp32_time / int8_time:5.2f}x  "
+            f"size {serialized_size(fp32_model) / 2**20:6.1f} -> {serialized_size(int8_model) / 2**20:6.1f} MB  {extra}"
+        )
+
+    # RMVPE
+    rss0 = current_rss()
+    fp32_rmvpe = RMVPE(args.rmvpe, is_half=False, onnx=False, device="cpu")
+    rss1 = current_rss()
+    int8_rmvpe = RMVPE(args.rmvpe, is_half=False, onnx=False, device="cpu", quantize=True)
+    rss2 = current_rss()
+    f0_fp32, t_fp32 = timed(lambda: fp32_rmvpe.infer_from_audio(audio, thred=0.03))
+    f0_int8, t_int8 = timed(lambda: int8_rmvpe.infer_from_audio(audio, thred=0.03))
+    agreement, cents = f0_error(f0_fp32, f0_int8)
+    report(
+        "rmvpe", t_fp32, t_int8, fp32_rmvpe.model, int8_rmvpe.model,
+        f"rss +{(rss1 - rss0) / 2**20:.0f} / +{(rss2 - rss1) / 2**20:.0f} MB  "
+        f"voicing {agreement:.4f}  rms {cents:.2f} cents",
+    )
+
+    # HuBERT
+    models, _, _ = checkpoint_utils.load_model_ensemble_and_task([args.hubert], suffix="")
+    fp32_hubert = models[0].float().eval()
+    int8_hubert = quantize_hubert(copy.deepcopy(fp32_hubert))
+    source = torch.from_numpy(audio).float().view(1, -1)
+
+    def extract(model):
+        with torch.no_grad():
+            return model.extract_features(source=source, padding_mask=None, output_layer=12)[0]
+
+    feats_fp32, t_fp32 = timed(lambda: extract(fp32_hubert))
+    feats_int8, t_int8 = timed(lambda: extract(int8_hubert))
+    cosine = torch.nn.functional.cosine_similarity(feats_fp32, feats_int8, dim=-1).mean().item()
+    report("hubert", t_fp32, t_int8, fp32_hubert, int8_hubert, f"mean cosine {cosine:.4f}")
+
+    # Synthesizer: same inputs and noise, compare the output audio
+    fp32_net_g, cpt = load_synthesizer(args.model, "cpu", is_half=False)
+    int8_net_g = quantize_synthesizer(copy.deepcopy(fp32_net_g))
+    inputs = synth_inputs(fp32_net_g, cpt, args.seconds)
+
+    def synth(net_g):
+        torch.manual_seed(0)
+        with torch.no_grad():
+            return net_g.infer(*inputs)[0][0, 0].numpy()
+
+    wav_fp32, t_fp32 = timed(lambda: synth(fp32_net_g))
+    wav_int8, t_int8 = timed(lambda: synth(int8_net_g))
+    tgt_sr = cpt["config"][-1]
+    mel_db = log_mel_distance(wav_fp32, wav_int8, tgt_sr)
+    out_f0 = [
+        fp32_rmvpe.infer_from_audio(librosa.resample(w, orig_sr=tgt_sr, target_sr=16000), thred=0.03)
+        for w in (wav_fp32, wav_int8)
+    ]
+    agreement, cents = f0_error(*out_f0)
+    report(
+        "synth", t_fp32, t_int8, fp32_net_g, int8_net_g,
+        f"log-mel L1 {mel_db:.3f} dB  output f0 voicing {agreement:.4f}  rms {cents:.2f} cents",
+    )
+
+
+def bench_chunks(args):
+    """Effect of x_center on CPU speed: padded chunk synthesis time per second of output."""
+    import torch
+    from config import chunk_bytes
+    from synth_pack import load_synthesizer
+
+    torch.set_num_threads(args.threads)
+    dtype = torch.bfloat16 if args.precision == "bf16" else torch.float32
+    net_g, cpt = load_synthesizer(args.model, "cpu", is_half=False, dtype=dtype)
+    net_g.enc_p.encoder.set_attention_chunk(args.attn_chunk)
+    for seconds in args.sizes:
+        # Every chunk is synthesized with x_pad seconds of context on both sides
+        inputs = list(synth_inputs(net_g, cpt, seconds + 2 * args.pad))
+        inputs[0] = inputs[0].to(dtype)
+        rss0 = current_rss()
+        elapsed = time_synth(net_g, inputs, args.repeats)
+        print(
+            f"x_center {seconds:5.0f}s  {elapsed:7.3f}s/chunk  "
+            f"{seconds / elapsed:6.2f}x realtime  est peak {chunk_bytes(seconds + 2 * args.pad, args.attn_chunk) / 2**20:7.0f} MB  "
+            f"rss +{(current_rss() - rss0) / 2**20:.0f} MB"
+        )
+
+
+def bench_mel(args):
+    """RMVPE mel front end: conv1d Fourier basis vs torch.stft on CPU."""
+    import torch
+    from rmvpe import MelSpectrogram
+
+    torch.set_num_threads(args.threads)
+    audio = torch.from_numpy(load_or_synth(args.audio, 16000, args.seconds)).float().unsqueeze(0)
+    results = {}
+    for mode in ("conv", "fft"):
+        t0 = ttime()
+        extractor = MelSpectrogram(False, 128, 16000, 1024, 160, None, 30, 8000, stft_mode=mode)
+        extractor(audio[:, :16000])
+        setup = ttime() - t0
+        with torch.no_grad():
+            t0 = ttime()
+            for _ in range(args.repeats):
+                results[mode] = extractor(audio)
+            elapsed = (ttime() - t0) / args.repeats
+        print(
+            f"{mode:<5} setup {setup * 1000:7.1f} ms  "
+            f"{elapsed / args.seconds * 60 * 1000:8.1f} ms per minute of audio"
+        )
+    diff = (results["conv"] - results["fft"]).abs()
+    print(f"log-mel max abs diff {diff.max().item():.2e}, mean {diff.mean().item():.2e}")
+
+
+def bench_rmvpe_segments(args):
+    """Segmented vs single-pass RMVPE: f0 agreement and peak RSS growth per input length.
+
+    Lengths up to --max-full are checked with RMVPE.check_segments; the
+    command exits non-zero if any of them is outside the tolerance.
+    """
+    import torch
+    from rmvpe import RMVPE
+
+    torch.set_num_threads(args.threads)
+    model = RMVPE(args.rmvpe, is_half=False, onnx=False, device="cpu")
+    model.segment_frames = args.segment
+    failures = []
+    for seconds in args.lengths:
+        audio = load_or_synth(args.audio, 16000, seconds)[: int(seconds * 16000)]
+        seg_f0, seg_time, seg_peak = peak_rss_during(lambda: model.infer_from_audio(audio))
+        line = f"{seconds:7.0f}s  segmented {seg_time:7.2f}s peak +{seg_peak / 2**20:6.0f} MB"
+        if seconds <= args.max_full:
+            try:
+                _, voicing, cents, max_cents = model.check_segments(
+                    audio, min_voicing=args.min_voicing, max_rms_cents=args.max_rms_cents
+                )
+                line += f"  voicing {voicing:.4f}  rms {cents:.2f} max {max_cents:.1f} cents  ok"
+            except AssertionError as e:
+                failures.append(seconds)
+                line += f"  FAILED: {e}"
+        print(line)
+    if failures:
+        sys.exit("segmented RMVPE outside tolerance for %s s inputs" % failures)
+
+
+def bench_rmvpe_onnx(args):
+    """Torch vs ONNX Runtime RMVPE on CPU across thread counts and ORT optimization levels."""
+    import torch
+    from rmvpe import RMVPE
+    from onnx_export import ensure_exported
+
+    audio = load_or_synth(args.audio, 16000, args.seconds)
+    minutes = len(audio) / 16000 / 60
+    ensure_exported("rmvpe", args.rmvpe, args.onnx)
+    for threads in args.threads:
+        torch.set_num_threads(threads)
+        model = RMVPE(args.rmvpe, is_half=False, onnx=False, device="cpu")
+        model.infer_from_audio(audio[:16000])  # warm-up
+        t0 = ttime()
+        ref = model.infer_from_audio(audio)
+        torch_time = ttime() - t0
+        print(f"threads {threads:2d}  torch        {torch_time / minutes:7.2f} s/min")
+        for level in args.opt_levels:
+            model = RMVPE(
+                args.onnx, is_half=False, onnx=True, device="cpu",
+                onnx_threads=threads, onnx_opt_level=level,
+            )
+            model.infer_from_audio(audio[:16000])
+            t0 = ttime()
+            f0 = model.infer_from_audio(audio)
+            onnx_time = ttime() - t0
+            agreement, cents = f0_error(ref, f0)
+            print(
+                f"threads {threads:2d}  onnx {level:8s}{onnx_time / minutes:7.2f} s/min  "
+                f"x{torch_time / onnx_time:5.2f}  voicing {agreement:.4f}  rms {cents:.2f} cents"
+            )
+
+
+def bench_uvr5_windows(args):
+    """UVR5 windows/sec on CPU for the VR (_audio_pre_) and new (_audio_pre_new) nets per batch size."""
+    import torch
+    from lib.uvr5_pack.utils import inference
+    from lib.uvr5_pack.lib_v5.model_param_init import ModelParameters
+    from lib.uvr5_pack.lib_v5.nets_new import CascadedNet
+    from lib.uvr5_pack.lib_v5 import nets_61968KB as nets
+
+    torch.set_num_threads(args.threads)
+    params_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "lib/uvr5_pack/lib_v5/modelparams")
+    archs = {
+        "_audio_pre_": ("4band_v2.json", lambda bins: nets.CascadedASPPNet(bins * 2)),
+        "_audio_pre_new": ("4band_v3.json", lambda bins: CascadedNet(bins * 2, 48)),
+    }
+    for name in args.archs:
+        params, build = archs[name]
+        mp = ModelParameters(os.path.join(params_dir, params))
+        model = build(mp.param["bins"]).eval()
+        # random weights: throughput does not depend on them
+        frames = int(args.seconds * mp.param["sr"] / mp.param["band"][len(mp.param["band"])]["hl"])
+        rng = np.random.default_rng(0)
+        X_spec = (rng.standard_normal((2, mp.param["bins"] + 1, frames)) * (1 + 1j)).astype(np.complex64)
+        aggressiveness = {"value": 0.1, "split_bin": mp.param["band"][1]["crop_stop"]}
+        reference = None
+        for batch_size in args.batch_sizes:
+            data = {"window_size": 512, "tta": args.tta, "batch_size": batch_size}
+            t0 = ttime()
+            pred, _, _ = inference(X_spec, "cpu", model, aggressiveness, data)
+            elapsed = ttime() - t0
+            roi_size = 512 - 2 * model.offset
+            n_windows = int(np.ceil(frames / roi_size)) * (2 if args.tta else 1) + int(args.tta)
+            if reference is None:
+                reference = pred
+            diff = float(np.abs(pred - reference).max())
+            print(
+                f"{name:15s} batch {batch_size:3d}  {n_windows / elapsed:7.2f} windows/s  "
+                f"{elapsed:7.2f}s  max diff {diff:.2e}"
+            )
+
+
+def legacy_multiband(wave, mp):
+    """The pre-engine UVR5 front end: bands one after another, two STFTs each."""
+    import librosa
+    from lib.uvr5_pack.lib_v5 import spec_utils
+
+    bands_n = len(mp.param["band"])
+    waves, specs = {bands_n: wave}, {}
+    for d in range(bands_n, 0, -1):
+        bp = mp.param["band"][d]
+        if d < bands_n:
+            waves[d] = librosa.resample(
+                waves[d + 1], mp.param["band"][d + 1]["sr"], bp["sr"], res_type=bp["res_type"]
+            )
+        specs[d] = spec_utils.wave_to_spectrogram(
+            waves[d], bp["hl"], bp["n_fft"],
+            mp.param["mid_side"], mp.param["mid_side_b2"], mp.param["reverse"],
+        )
+    return specs
+
+
+def bench_uvr5_spec(args):
+    """Multiband STFT/ISTFT engine vs the sequential UVR5 path on a 4-band model."""
+    from lib.uvr5_pack.lib_v5 import spec_utils
+    from lib.uvr5_pack.lib_v5.model_param_init import ModelParameters
+
+    params_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "lib/uvr5_pack/lib_v5/modelparams")
+    mp = ModelParameters(os.path.join(params_dir, args.params))
+    top_sr = mp.param["band"][len(mp.param["band"])]["sr"]
+    mono = load_or_synth(args.audio, top_sr, args.seconds)
+    wave = np.asfortranarray([mono, np.roll(mono, 100)])
+
+    t0 = ttime()
+    ref_specs = legacy_multiband(wave, mp)
+    legacy_forward = ttime() - t0
+    spec_m = spec_utils.combine_spectrograms(ref_specs, mp)
+    print(f"legacy      forward {legacy_forward:6.2f}s")
+    for n_workers in args.workers:
+        t0 = ttime()
+        specs = spec_utils.wave_to_multiband_spectrogram(wave, mp, n_workers)
+        forward = ttime() - t0
+        diff = max(float(np.abs(specs[d] - ref_specs[d]).max()) for d in specs)
+        t0 = ttime()
+        spec_utils.cmb_spectrogram_to_wave(spec_m, mp, n_workers=n_workers)
+        inverse = ttime() - t0
+        print(
+            f"workers {n_workers:2d}  forward {forward:6.2f}s (x{legacy_forward / forward:4.2f}, "
+            f"max diff {diff:.1e})  inverse {inverse:6.2f}s"
+        )
+
+
+def bench_load_audio(args):
+    """Per-file load latency and process spawns: ffmpeg/ffprobe vs in-process decoding."""
+    import tempfile
+    import ffmpeg
+    import soundfile as sf
+    import audio_io
+    from my_utils import load_audio, check_audio_duration
+
+    tmp = tempfile.mkdtemp()
+    files = []
+    for i in range(args.files):
+        path = os.path.join(tmp, "%d_line.wav" % i)
+        sf.write(path, load_or_synth(None, args.sr, args.seconds), args.sr, subtype="PCM_16")
+        files.append(path)
+
+    t0 = ttime()
+    for path in files:
+        ref = audio_io.ffmpeg_decode(path, 16000)
+        float(ffmpeg.probe(path)["streams"][0]["duration"])
+    legacy = (ttime() - t0) / len(files)
+    print(f"ffmpeg+ffprobe  {legacy * 1000:7.2f} ms/file  {2 * len(files)} spawns")
+
+    for key in audio_io.decode_stats:
+        audio_io.decode_stats[key] = 0
+    t0 = ttime()
+    for path in files:
+        check_audio_duration(path)
+        audio = load_audio(path, 16000)
+    current = (ttime() - t0) / len(files)
+    spawns = audio_io.decode_stats["ffmpeg"] + audio_io.decode_stats["ffprobe"]
+    n = min(len(ref), len(audio))
+    print(
+        f"in-process      {current * 1000:7.2f} ms/file  {spawns} spawns  "
+        f"x{legacy / current:5.1f}  max diff vs ffmpeg {np.abs(ref[:n] - audio[:n]).max():.1e}"
+    )
+
+
+def bench_formant(args):
+    """In-memory formant shifting: ms per utterance (vs the stftpitchshift package if installed)."""
+    from formant import formant_shift
+
+    audio = load_or_synth(args.audio, args.sr, args.seconds)
+    formant_shift(audio, args.sr, args.quefrency, args.timbre)
+    t0 = ttime()
+    for _ in range(args.repeats):
+        shifted = formant_shift(audio, args.sr, args.quefrency, args.timbre)
+    elapsed = (ttime() - t0) / args.repeats
+    print(f"formant_shift  {elapsed * 1000:8.2f} ms per {len(audio) / args.sr:.1f}s utterance")
+    try:
+        from stftpitchshift import StftPitchShift
+    except ImportError:
+        return
+    shifter = StftPitchShift(1024, 256, args.sr)
+    t0 = ttime()
+    ref = shifter.shiftpitch(audio, factors=1, quefrency=args.quefrency * 1e-3, distortion=args.timbre)
+    reference = ttime() - t0
+    print(
+        f"stftpitchshift {reference * 1000:8.2f} ms  "
+        f"log-mel distance {log_mel_distance(ref, shifted, args.sr):.3f}"
+    )
+
+
+def legacy_interpolate_f0(f0):
+    """F0Predictor.interpolate_f0 before vectorization (frame loops)."""
+    data = np.reshape(f0.copy(), (f0.size, 1))
+    vuv_vector = np.zeros((data.size, 1), dtype=np.float32)
+    vuv_vector[data > 0.0] = 1.0
+    ip_data = data
+    frame_number = data.size
+    last_value = 0.0
+    for i in range(frame_number):
+        if data[i] <= 0.0:
+            j = i + 1
+            for j in range(i + 1, frame_number):
+                if data[j] > 0.0:
+                    break
+            if j < frame_number - 1:
+                if last_value > 0.0:
+                    step = (data[j] - data[i - 1]) / float(j - i)
+                    for k in range(i, j):
+                        ip_data[k] = data[i - 1] + step * (k - i + 1)
+                else:
+                    for k in range(i, j):
+                        ip_data[k] = data[j]
+            else:
+                for k in range(i, frame_number):
+                    ip_data[k] = last_value
+        else:
+            last_value = data[i]
+    return ip_data[:, 0], vuv_vector[:, 0]
+
+
+def bench_f0_interp(args):
+    """Vectorized F0Predictor.interpolate_f0 vs the frame loop on long curves."""
+    from lib.infer_pack.modules.F0Predictor.F0Predictor import F0Predictor
+
+    predictor = F0Predictor()
+    rng = np.random.default_rng(0)
+    frames = int(args.minutes * 60 * args.fps)
+    f0 = 150 + 50 * rng.random(frames)
+    # unvoiced runs of 1 .. max_gap frames
+    pos = 0
+    while pos < frames:
+        pos += int(rng.integers(1, 200))
+        gap = int(rng.integers(1, args.max_gap))
+        f0[pos : pos + gap] = 0
+        pos += gap
+    for case, curve in (("random", f0), ("edges", np.concatenate([[0, 0], f0[:1000], [0, 0, 180]]))):
+        t0 = ttime()
+        ref = legacy_interpolate_f0(curve)
+        legacy = ttime() - t0
+        t0 = ttime()
+        out = predictor.interpolate_f0(curve.copy())
+        current = ttime() - t0
+        same = np.array_equal(ref[0], out[0]) and np.array_equal(ref[1], out[1])
+        print(
+            f"{case:7s} {len(curve):8d} frames  loop {legacy:8.3f}s  numpy {current * 1000:7.2f} ms  "
+            f"x{legacy / current:8.0f}  identical {same}"
+        )
+
+
+def bench_attention(args):
+    """attentions.Encoder (RVC TextEncoder config) with full vs chunked self-attention."""
+    import torch
+    from lib.infer_pack.attentions import Encoder
+
+    torch.set_num_threads(args.threads)
+    torch.manual_seed(0)
+    encoder = Encoder(args.hidden, args.hidden * 4, 2, 6, 3, 0, window_size=10).eval()
+    for seconds in args.seconds:
+        frames = int(100 * seconds)
+        x = torch.randn(1, args.hidden, frames)
+        x_mask = torch.ones(1, 1, frames)
+        x_mask[..., frames - 50 :] = 0
+        with torch.no_grad():
+            encoder.set_attention_chunk(args.attn_chunk)
+            chunked, t_chunked, peak_chunked = peak_rss_during(lambda: encoder(x, x_mask))
+            line = f"{seconds:5.0f}s  chunked {t_chunked:6.2f}s peak +{peak_chunked / 2**20:6.0f} MB"
+            encoder.set_attention_chunk(None)
+            full, t_full, peak_full = peak_rss_during(lambda: encoder(x, x_mask))
+        line += (
+            f"  full {t_full:6.2f}s peak +{peak_full / 2**20:6.0f} MB  "
+            f"max diff {(full - chunked).abs().max().item():.2e}"
+        )
+        print(line)
+
+
+def bench_stitch(args):
+    """Left context encoded but not vocoded (infer rate): vocoded/output samples and time per line."""
+    import torch
+    from synth_pack import load_synthesizer
+
+    torch.set_num_threads(args.threads)
+    net_g, cpt = load_synthesizer(args.model, "cpu", is_half=False)
+    per_frame = cpt["config"][-1] // 100
+    skip = int(round((args.pad - args.vocode_pad) * 100))
+    for seconds in args.lengths:
+        inputs = synth_inputs(net_g, cpt, seconds + 2 * args.pad)
+        frames = inputs[0].shape[1]
+        rate = (frames - skip + 0.5) / frames
+        output = int(seconds * 100) * per_frame
+        full = time_synth(net_g, inputs, args.repeats)
+        with torch.no_grad():
+            vocoded = net_g.infer(*inputs, rate=rate)[0].shape[-1]
+        skipped = time_synth(_RateWrapper(net_g, rate), inputs, args.repeats)
+        print(
+            f"{seconds:5.1f}s line  vocoded/output {frames * per_frame / output:5.2f} -> "
+            f"{vocoded / output:5.2f}  {full * 1000:7.1f} -> {skipped * 1000:7.1f} ms"
+        )
+
+
+class _RateWrapper:
+    def __init__(self, net_g, rate):
+        self.net_g, self.rate = net_g, rate
+
+    def infer(self, *inputs):
+        return self.net_g.infer(*inputs, rate=self.rate)
+
+
+def bench_short_lines(args):
+    """Per-utterance overhead of VC.pipeline for short lines: fast path vs x_pad padding."""
+    import torch
+    from fairseq import checkpoint_utils
+    from config import Config
+    from synth_pack import load_synthesizer
+    from vc_infer_pipeline import VC
+
+    torch.set_num_threads(args.threads)
+    models, _, _ = checkpoint_utils.load_model_ensemble_and_task([args.hubert], suffix="")
+    hubert = models[0].float().eval()
+    net_g, cpt = load_synthesizer(args.model, "cpu", is_half=False)
+    tgt_sr = cpt["config"][-1]
+    version = cpt.get("version", "v1")
+    lines = [load_or_synth(args.audio, 16000, args.seconds) for _ in range(args.lines)]
+    for label, short_pad in (("x_pad", None), ("short", args.short_pad)):
+        config = Config("cpu", False, short_pad=short_pad)
+        if config.attn_chunk:
+            net_g.enc_p.encoder.set_attention_chunk(config.attn_chunk)
+        vc = VC(tgt_sr, config)
+        run = lambda audio, times: vc.pipeline(
+            hubert, net_g, 0, audio, "", times, 0, args.f0method, args.index, 0.5,
+            cpt.get("f0", 1), 3, tgt_sr, 0, 1, version, 0.33, 128, False, False,
+        )
+        run(lines[0], [0, 0, 0])  # warm-up: index, f0 model
+        times = [0, 0, 0]
+        t0 = ttime()
+        for audio in lines:
+            run(audio, times)
+        wall = (ttime() - t0) / args.lines
+        model_time = sum(times) / args.lines
+        print(
+            f"{label:6s} {wall * 1000:7.1f} ms/line  hubert+index {times[0] / args.lines * 1000:6.1f}  "
+            f"f0 {times[1] / args.lines * 1000:6.1f}  synth {times[2] / args.lines * 1000:6.1f}  "
+            f"other {(wall - model_time) * 1000:6.1f} ms"
+        )
+
+
+def bench_workers(args):
+    """model_pool.py worker processes on CPU: characters split K ways, cores split evenly."""
+    import json
+    import subprocess
+    import tempfile
+    from scipy.io import wavfile
+
+    n_cpu = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count()
+    tmp = tempfile.mkdtemp()
+    characters = []
+    for c in range(args.characters):
+        jobs = []
+        for i in range(args.lines):
+            path = os.path.join(tmp, f"{i}_C{c}.wav")
+            wavfile.write(path, 16000, load_or_synth(None, 16000, args.seconds))
+            jobs.append({
+                "input_path": path,
+                "opt_path": os.path.join(tmp, f"{i}_C{c}_out.wav"),
+                "model_path": args.models[c % len(args.models)],
+                "index_path": args.index,
+                "f0up_key": 0,
+                "f0method": args.f0method,
+            })
+        characters.append(jobs)
+    total = args.characters * args.lines
+    pool_script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "model_pool.py")
+    base = None
+    for k in args.workers:
+        if k > args.characters:
+            print(f"{k:3d} workers: more workers than characters, skipped")
+            continue
+        threads = max(1, n_cpu // k)
+        procs = []
+        t0 = ttime()
+        for w in range(k):
+            # the worker takes its own slice of cores and RAM (model_pool.run_jobs)
+            settings = {
+                "jobs": [job for jobs in characters[w::k] for job in jobs],
+                "device": "cpu",
+                "is_half": False,
+                "max_models": args.max_models,
+                "worker": w,
+                "workers": k,
+            }
+            jobs_path = os.path.join(tmp, f"jobs_{k}_{w}.json")
+            with open(jobs_path, "w") as f:
+                json.dump(settings, f)
+            procs.append(
+                subprocess.Popen(
+                    [sys.executable, pool_script, jobs_path],
+                    stdout=subprocess.DEVNULL,
+                    stderr=subprocess.DEVNULL,
+                )
+            )
+        failed = sum(proc.wait() != 0 for proc in procs)
+        wall = ttime() - t0
+        base = base or wall
+        print(
+            f"{k:3d} workers x {threads:2d} threads  {wall:7.1f} s  {total / wall:6.2f} lines/s  "
+            f"speedup {base / wall:5.2f}" + (f"  {failed} failed" if failed else "")
+        )
+
+
+def bench_encode(args):
+    """Output encoding from the int16 pipeline buffer: time, size and path per format."""
+    from audio_io import encode_audio, encode_stats
+
+    audio = load_or_synth(args.audio, args.sr, args.seconds)
+    audio = (audio / max(np.abs(audio).max() / 0.99, 1) * 32768).astype(np.int16)
+    seconds = len(audio) / args.sr
+    for format in args.formats:
+        before = dict(encode_stats)
+        t0 = ttime()
+        try:
+            data = encode_audio(audio, args.sr, format, args.bitrate)
+        except Exception as e:
+            print(f"{format:5s} failed: {e}")
+            continue
+        elapsed = ttime() - t0
+        path = "in-process" if encode_stats["inprocess"] > before["inprocess"] else "ffmpeg pipe"
+        print(
+            f"{format:5s} {elapsed * 1000:8.1f} ms  {seconds / elapsed:7.1f}x realtime  "
+            f"{len(data) / 2**10:8.1f} KiB  {len(data) * 8 / seconds / 1000:6.1f} kbit/s  {path}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="RVC CPU benchmarks")
+    sub = parser.add_subparsers(dest="bench", required=True)
+
+    p = sub.add_parser("world_f0", help="segmented harvest/dio vs single pass")
+    p.add_argument("--audio", default=None)
+    p.add_argument("--seconds", type=float, default=600)
+    p.add_argument("--method", default="harvest", choices=["harvest", "dio"])
+    p.add_argument("--f0-min", type=int, default=50)
+    p.add_argument("--f0-max", type=int, default=1100)
+    p.add_argument("--segment", type=float, default=30)
+    p.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    p.set_defaults(func=bench_world_f0)
+
+    p = sub.add_parser("sinegen", help="NSF SineGen time and memory per second of audio")
+    p.add_argument("--seconds", type=float, default=30)
+    p.add_argument("--sr", type=int, default=48000)
+    p.add_argument("--harmonics", type=int, default=0)
+    p.add_argument("--threads", type=int, default=1)
+    p.add_argument("--repeats", type=int, default=5)
+    p.set_defaults(func=bench_sinegen)
+
+    p = sub.add_parser("synth_pack", help="raw .pth vs inference pack load/synthesis time")
+    p.add_argument("model")
+    p.add_argument("--packed", default=None)
+    p.add_argument("--half", action="store_true")
+    p.add_argument("--chunk", type=float, default=10)
+    p.add_argument("--threads", type=int, default=4)
+    p.add_argument("--repeats", type=int, default=3)
+    p.set_defaults(func=bench_synth_pack)
+
+    p = sub.add_parser("onnx", help="ONNX Runtime vs PyTorch CPU for HuBERT and the synthesizer")
+    p.add_argument("model")
+    p.add_argument("--hubert", default="rvc_models/hubert_base.pt")
+    p.add_argument("--audio", default=None)
+    p.add_argument("--chunk", type=float, default=10)
+    p.add_argument("--threads", type=int, default=4)
+    p.add_argument("--repeats", type=int, default=3)
+    p.set_defaults(func=bench_onnx)
+
+    p = sub.add_parser("quantize", help="dynamic int8 vs fp32 quality, speed and memory on CPU")
+    p.add_argument("model")
+    p.add_argument("--hubert", default="rvc_models/hubert_base.pt")
+    p.add_argument("--rmvpe", default="rvc_models/rmvpe.pt")
+    p.add_argument("--audio", default=None)
+    p.add_argument("--seconds", type=float, default=10)
+    p.add_argument("--threads", type=int, default=4)
+    p.add_argument("--repeats", type=int, default=3)
+    p.set_defaults(func=bench_quantize)
+
+    p = sub.add_parser("chunks", help="CPU synthesis speed versus chunk size")
+    p.add_argument("model")
+    p.add_argument("--sizes", type=float, nargs="+", default=[5, 10, 20, 30, 45, 60])
+    p.add_argument("--pad", type=float, default=1)
+    p.add_argument("--precision", default="fp32", choices=["fp32", "bf16"])
+    p.add_argument("--threads", type=int, default=4)
+    p.add_argument("--repeats", type=int, default=2)
+    p.add_argument("--attn-chunk", type=int, default=None, help="TextEncoder attention block (frames)")
+    p.set_defaults(func=bench_chunks)
+
+    p = sub.add_parser("attention", help="chunked vs full TextEncoder attention: error and peak RSS")
+    p.add_argument("--seconds", type=float, nargs="+", default=[10, 30, 60])
+    p.add_argument("--attn-chunk", type=int, default=1000)
+    p.add_argument("--hidden", type=int, default=192)
+    p.add_argument("--threads", type=int, default=4)
+    p.set_defaults(func=bench_attention)
+
+    p = sub.add_parser("mel", help="RMVPE mel extraction: conv basis vs FFT")
+    p.add_argument("--audio", default=None)
+    p.add_argument("--seconds", type=float, default=60)
+    p.add_argument("--threads", type=int, default=4)
+    p.add_argument("--repeats", type=int, default=3)
+    p.set_defaults(func=bench_mel)
+
+    p = sub.add_parser("rmvpe_segments", help="segmented RMVPE accuracy and memory")
+    p.add_argument("--rmvpe", default="rvc_models/rmvpe.pt")
+    p.add_argument("--audio", default=None)
+    p.add_argument("--lengths", type=float, nargs="+", default=[60, 300, 1200, 3600])
+    p.add_argument("--segment", type=int, default=3200)
+    p.add_argument("--max-full", type=float, default=600, help="skip the single pass above this length")
+    p.add_argument("--min-voicing", type=float, default=0.995)
+    p.add_argument("--max-rms-cents", type=float, default=5.0)
+    p.add_argument("--threads", type=int, default=4)
+    p.set_defaults(func=bench_rmvpe_segments)
+
+    p = sub.add_parser("rmvpe_onnx", help="torch vs ONNX Runtime RMVPE on CPU")
+    p.add_argument("--audio", default=None)
+    p.add_argument("--seconds", type=float, default=60)
+    p.add_argument("--rmvpe", default="rvc_models/rmvpe.pt")
+    p.add_argument("--onnx", default="rvc_models/rmvpe.onnx")
+    p.add_argument("--threads", type=int, nargs="+", default=[1, 4, 8])
+    p.add_argument(
+        "--opt-levels", nargs="+", default=["basic", "all"],
+        choices=["disable", "basic", "extended", "all"],
+    )
+    p.set_defaults(func=bench_rmvpe_onnx)
+
+    p = sub.add_parser("uvr5_windows", help="batched UVR5 window inference, windows/sec")
+    p.add_argument("--seconds", type=float, default=60)
+    p.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 2, 4, 8])
+    p.add_argument("--archs", nargs="+", default=["_audio_pre_", "_audio_pre_new"])
+    p.add_argument("--tta", action="store_true")
+    p.add_argument("--threads", type=int, default=4)
+    p.set_defaults(func=bench_uvr5_windows)
+
+    p = sub.add_parser("uvr5_spec", help="UVR5 multiband STFT/ISTFT engine vs sequential path")
+    p.add_argument("--audio", default=None)
+    p.add_argument("--seconds", type=float, default=180)
+    p.add_argument("--params", default="4band_v2.json")
+    p.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    p.set_defaults(func=bench_uvr5_spec)
+
+    p = sub.add_parser("load_audio", help="in-process WAV decoding vs ffmpeg per file")
+    p.add_argument("--files", type=int, default=50)
+    p.add_argument("--seconds", type=float, default=3)
+    p.add_argument("--sr", type=int, default=48000)
+    p.set_defaults(func=bench_load_audio)
+
+    p = sub.add_parser("formant", help="in-memory formant shift per utterance")
+    p.add_argument("--audio", default=None)
+    p.add_argument("--seconds", type=float, default=2)
+    p.add_argument("--sr", type=int, default=16000)
+    p.add_argument("--quefrency", type=float, default=8.0)
+    p.add_argument("--timbre", type=float, default=1.2)
+    p.add_argument("--repeats", type=int, default=20)
+    p.set_defaults(func=bench_formant)
+
+    p = sub.add_parser("f0_interp", help="vectorized interpolate_f0 vs frame loop")
+    p.add_argument("--minutes", type=float, default=10)
+    p.add_argument("--fps", type=int, default=100)
+    p.add_argument("--max-gap", type=int, default=400)
+    p.set_defaults(func=bench_f0_interp)
+
+    p = sub.add_parser("stitch", help="vocoded/output sample ratio with rate-based context skipping")
+    p.add_argument("model")
+    p.add_argument("--lengths", type=float, nargs="+", default=[1, 2, 5, 10, 30])
+    p.add_argument("--pad", type=float, default=1, help="x_pad seconds")
+    p.add_argument("--vocode-pad", type=float, default=0.3)
+    p.add_argument("--threads", type=int, default=4)
+    p.add_argument("--repeats", type=int, default=3)
+    p.set_defaults(func=bench_stitch)
+
+    p = sub.add_parser("short_lines", help="per-utterance overhead for short lines on CPU")
+    p.add_argument("model")
+    p.add_argument("--hubert", default="rvc_models/hubert_base.pt")
+    p.add_argument("--index", default="")
+    p.add_argument("--audio", default=None)
+    p.add_argument("--seconds", type=float, default=2)
+    p.add_argument("--lines", type=int, default=20)
+    p.add_argument("--short-pad", type=float, default=0.3)
+    p.add_argument("--f0method", default="rmvpe")
+    p.add_argument("--threads", type=int, default=4)
+    p.set_defaults(func=bench_short_lines)
+
+    p = sub.add_parser("workers", help="scaling of parallel model_pool workers on CPU, 1..16 processes")
+    p.add_argument("models", nargs="+", help="one .pth per character, reused round-robin")
+    p.add_argument("--index", default="")
+    p.add_argument("--characters", type=int, default=16)
+    p.add_argument("--lines", type=int, default=8, help="lines per character")
+    p.add_argument("--seconds", type=float, default=3)
+    p.add_argument("--f0method", default="rmvpe")
+    p.add_argument("--max-models", type=int, default=2)
+    p.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    p.set_defaults(func=bench_workers)
+
+    p = sub.add_parser("encode", help="output encoding speed and size per format")
+    p.add_argument("--audio", default=None)
+    p.add_argument("--seconds", type=float, default=60)
+    p.add_argument("--sr", type=int, default=40000)
+    p.add_argument("--formats", nargs="+", default=["wav", "flac", "ogg", "opus", "mp3"])
+    p.add_argument("--bitrate", default=None, help="e.g. 96k; lossy formats then go through ffmpeg")
+    p.set_defaults(func=bench_encode)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+import os
+from multiprocessing import cpu_count
+
+import torch
+
+
+def available_memory():
+    """Available system RAM in bytes (MemAvailable on Linux)."""
+    try:
+        import psutil
+
+        return psutil.virtual_memory().available
+    except ImportError:
+        pass
+    try:
+        with open("/proc/meminfo") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE")
+
+
+def cpu_supports_bf16():
+    is_supported = getattr(torch.cpu, "_is_avx512_bf16_supported", None)
+    return bool(is_supported and is_supported())
+
+
+def resolve_device(device):
+    """The device Config ends up on: cuda falls back to mps, then cpu."""
+    if device.startswith("cuda") and torch.cuda.is_available():
+        return device
+    if device.startswith("mps") or (
+        not device.startswith("cpu") and torch.backends.mps.is_available()
+    ):
+        return "mps"
+    return "cpu"
+
+
+def chunk_bytes(seconds, attn_chunk=None):
+    """Rough peak RAM for converting one chunk on CPU in fp32.
+
+    TextEncoder attention keeps about six [heads=2, t, t] fp32 tensors alive
+    at 100 frames per second ([2, attn_chunk, t] with chunked attention); the
+    NSF generator adds a roughly linear term.
+    """
+    frames = 100 * seconds
+    rows = min(frames, attn_chunk) if attn_chunk else frames
+    return 6 * 2 * rows * frames * 4 + 96 * 2**20 * seconds
+
+
+class Config:
+    """Device, precision and chunk-size policy for inference.
+
+    Nothing here touches the filesystem. precision is "fp16", "bf16" or
+    "fp32"; None picks fp16 on capable GPUs and fp32 on CPU (fp16 is both
+    slow and partly unsupported there). bf16 is only honoured on CPUs that
+    report native support. F0 extraction and index search always run fp32.
+    """
+
+    def __init__(
+        self,
+        device,
+        is_half,
+        backend="torch",
+        quantize=False,
+        precision=None,
+        chunk_seconds=None,
+        ram_fraction=0.25,
+        rmvpe_path="rvc_models/rmvpe.pt",
+        rmvpe_onnx_path="rvc_models/rmvpe.onnx",
+        onnx_threads=None,
+        onnx_opt_level="all",
+        attn_chunk=None,
+        vocode_pad=0.3,
+        short_pad=0.3,
+        n_cpu=0,
+    ):
+        self.backend = backend
+        # TextEncoder attention block (frames); None = 1000 on CPU, full on GPU
+        self.attn_chunk = attn_chunk
+        # seconds of left chunk context still vocoded; None vocodes all of x_pad
+        self.vocode_pad = vocode_pad
+        # seconds of reflect padding for inputs shorter than x_max; None = x_pad
+        self.short_pad = short_pad
+        self.rmvpe_path = rmvpe_path
+        self.rmvpe_onnx_path = rmvpe_onnx_path
+        # ORT intra-op threads (None = all cores) and graph optimization level
+        self.onnx_threads = onnx_threads
+        self.onnx_opt_level = onnx_opt_level
+        if backend == "onnx":
+            # ONNX Runtime runs the whole path on CPU
+            device = "cpu"
+        self.device = device
+        self.is_half = is_half
+        # worker processes for CPU f0 (world_f0); 0 = cpu_count()
+        self.n_cpu = n_cpu
+        self.gpu_name = None
+        self.gpu_mem = None
+        self.chunk_seconds = chunk_seconds
+        self.ram_fraction = ram_fraction
+        self.precision = self.select_precision(precision)
+        # dynamic int8 only exists for fp32 CPU torch inference
+        self.quantize = quantize and backend == "torch" and self.device == "cpu"
+        if backend == "onnx" or self.quantize:
+            self.precision = "fp32"
+        self.is_half = self.precision == "fp16"
+        self.dtype = {
+            "fp16": torch.float16,
+            "bf16": torch.bfloat16,
+            "fp32": torch.float32,
+        }[self.precision]
+        if self.attn_chunk is None and self.device == "cpu":
+            self.attn_chunk = 1000
+        self.x_pad, self.x_query, self.x_center, self.x_max = self.device_config()
+
+    def select_precision(self, precision):
+        if self.device.startswith("cuda") and torch.cuda.is_available():
+            i_device = int(self.device.split(":")[-1]) if ":" in self.device else 0
+            self.gpu_name = torch.cuda.get_device_name(i_device)
+            self.gpu_mem = int(
+                torch.cuda.get_device_properties(i_device).total_memory
+                / 1024
+                / 1024
+                / 1024
+                + 0.4
+            )
+            if (
+                ("16" in self.gpu_name and "V100" not in self.gpu_name.upper())
+                or "P40" in self.gpu_name.upper()
+                or "1060" in self.gpu_name
+                or "1070" in self.gpu_name
+                or "1080" in self.gpu_name
+            ):
+                print("16系/10系显卡和P40强制单精度")
+                return "fp32"
+            if precision is None:
+                return "fp16" if self.is_half else "fp32"
+            return precision
+        elif self.device.startswith("mps") or (
+            not self.device.startswith("cpu") and torch.backends.mps.is_available()
+        ):
+            print("没有发现支持的N卡, 使用MPS进行推理")
+            self.device = "mps"
+            return precision or ("fp16" if self.is_half else "fp32")
+        else:
+            if self.device != "cpu":
+                print("没有发现支持的N卡, 使用CPU进行推理")
+            self.device = "cpu"
+            if precision == "bf16" and not cpu_supports_bf16():
+                print("CPU has no native bf16, using fp32")
+                return "fp32"
+            return "bf16" if precision == "bf16" else "fp32"
+
+    def cpu_chunk_seconds(self):
+        """Longest chunk (s) whose estimated peak fits the RAM budget, capped at 60 s."""
+        budget = available_memory() * self.ram_fraction
+        seconds = 60
+        while seconds > 10 and chunk_bytes(seconds, self.attn_chunk) > budget:
+            seconds -= 2
+        return seconds
+
+    def device_config(self) -> tuple:
+        if self.n_cpu == 0:
+            self.n_cpu = cpu_count()
+
+        if self.device == "cpu":
+            # Bigger chunks mean fewer padded overlaps but full attention is
+            # quadratic; chunked attention lifts the 30 s cap. Measure with
+            # `benchmark.py chunks` and pass chunk_seconds to override
+            cap = 60 if self.attn_chunk else 30
+            x_center = self.chunk_seconds or min(self.cpu_chunk_seconds(), cap)
+            x_pad = 1
+            x_query = min(6, max(1, x_center // 5))
+            x_max = x_center + 3
+            return x_pad, x_query, x_center, x_max
+
+        if self.is_half:
+            # 6G显存配置
+            x_pad = 3
+            x_query = 10
+            x_center = 60
+            x_max = 65
+        else:
+            # 5G显存配置
+            x_pad = 1
+            x_query = 6
+            x_center = 38
+            x_max = 41
+
+        if self.gpu_mem != None and self.gpu_mem <= 4:
+            x_pad = 1
+            x_query = 5
+            x_center = 30
+            x_max = 32
+
+        return x_pad, x_query, x_center, x_max
@@ -0,0 +1,73 @@
+"""
+In-memory formant (timbre) shifting, the stftpitchshift -q/-t stage on arrays.
+
+Each STFT frame's spectral envelope is estimated by cepstral liftering
+(coefficients above the quefrency cutoff are dropped), stretched along the
+frequency axis by the timbre factor, and swapped for the original envelope.
+Pitch and phase are left alone. All frames are processed in one batch.
+"""
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+def default_framesize(sr):
+    """1024 at 44.1/48 kHz, scaled to a power of two for other rates."""
+    return int(2 ** np.round(np.log2(1024 * sr / 44100)))
+
+
+def stft(x, framesize, hopsize, window):
+    pad = framesize
+    x = np.pad(x, (pad, pad + (-len(x)) % hopsize))
+    frames = sliding_window_view(x, framesize)[::hopsize]
+    return np.fft.rfft(frames * window, axis=1), len(x)
+
+
+def istft(spec, length, framesize, hopsize, window):
+    frames = np.fft.irfft(spec, n=framesize, axis=1) * window
+    y = np.zeros(length)
+    norm = np.zeros(length)
+    # overlap-add in framesize // hopsize interleaved groups, each without overlaps
+    step = framesize // hopsize
+    for k in range(step):
+        group = frames[k::step]
+        starts = (np.arange(k, len(frames), step) * hopsize)[:, None] + np.arange(framesize)
+        y[starts.ravel()] += group.ravel()
+        norm[starts.ravel()] += np.tile(window**2, len(group))
+    return y / np.maximum(norm, 1e-8)
+
+
+def lifter(spec, quefrency):
+    """Spectral envelope (magnitude) per frame from the low-quefrency cepstrum."""
+    framesize = 2 * (spec.shape[1] - 1)
+    log_power = np.log10(np.maximum(np.abs(spec) ** 2, 1e-12))
+    cepstrum = np.fft.irfft(log_power, n=framesize, axis=1)
+    cepstrum[:, quefrency + 1 : framesize - quefrency] = 0
+    return 10 ** (np.fft.rfft(cepstrum, axis=1).real / 2)
+
+
+def stretch(envelopes, factor):
+    """envelope'(k) = envelope(k / factor), linear interpolation, zero past the top bin."""
+    bins = envelopes.shape[1]
+    positions = np.arange(bins) / factor
+    i0 = np.minimum(positions.astype(int), bins - 1)
+    i1 = np.minimum(i0 + 1, bins - 1)
+    frac = positions - i0
+    out = envelopes[:, i0] * (1 - frac) + envelopes[:, i1] * frac
+    out[:, positions > bins - 1] = 0
+    return out
+
+
+def formant_shift(audio, sr, quefrency=8.0, timbre=1.2, framesize=None):
+    """Shift formants of mono float audio by timbre (>1 up); quefrency in ms."""
+    if timbre == 1:
+        return audio
+    framesize = framesize or default_framesize(sr)
+    hopsize = framesize // 4
+    window = np.hanning(framesize + 1)[:-1]
+    n = len(audio)
+    spec, length = stft(np.asarray(audio, np.float64), framesize, hopsize, window)
+    q = int(np.clip(quefrency / 1000 * sr, 1, framesize // 2 - 1))
+    envelopes = lifter(spec, q)
+    spec *= stretch(envelopes, timbre) / envelopes
+    y = istft(spec, length, framesize, hopsize, window)
+    return y[framesize : framesize + n].astype(np.float32)
@@ -57,9 +57,23 @@ class Encoder(nn.Module):
                 )
             )
             self.norm_layers_2.append(LayerNorm(hidden_channels))
+        self.attn_chunk_size = None
+
+    def set_attention_chunk(self, chunk_size):
+        """Inference only: attend chunk_size query frames at a time.
+
+        Exact, including the relative embeddings; peak memory drops from
+        [b, h, t, t] to [b, h, chunk_size, t]. None restores full attention.
+        """
+        self.attn_chunk_size = chunk_size
+        for layer in self.attn_layers:
+            layer.chunk_size = chunk_size
 
     def forward(self, x, x_mask):
-        attn_mask = x_mask.unsqueeze(2) * x_mask.unsqueeze(-1)
+        if self.attn_chunk_size:
+            attn_mask = x_mask  # [b, 1, t]; expanded per block in attention()
+        else:
+            attn_mask = x_mask.unsqueeze(2) * x_mask.unsqueeze(-1)
         x = x * x_mask
         for i in range(self.n_layers):
             y = self.attn_layers[i](x, x, attn_mask)
@@ -185,6 +199,7 @@ class MultiHeadAttention(nn.Module):
         self.proximal_bias = proximal_bias
         self.proximal_init = proximal_init
         self.attn = None
+        self.chunk_size = None
 
         self.k_channels = channels // n_heads
         self.conv_q = nn.Conv1d(channels, channels, 1)
@@ -230,6 +245,19 @@ class MultiHeadAttention(nn.Module):
         key = key.view(b, self.n_heads, self.k_channels, t_s).transpose(2, 3)
         value = value.view(b, self.n_heads, self.k_channels, t_s).transpose(2, 3)
 
+        if (
+            self.chunk_size
+            and not self.training
+            and t_t > self.chunk_size
+            and t_s == t_t
+            and self.block_length is None
+            and not self.proximal_bias
+        ):
+            output = self._chunked_attention(query, key, value, mask)
+            return output.transpose(2, 3).contiguous().view(b, d, t_t), None
+        if mask is not None and mask.dim() == 3:  # x_mask [b, 1, t]
+            mask = mask.unsqueeze(2) * mask.unsqueeze(-1)
+
         scores = torch.matmul(query / math.sqrt(self.k_channels), key.transpose(-2, -1))
         if self.window_size is not None:
             assert (
@@ -274,6 +302,47 @@ class MultiHeadAttention(nn.Module):
         )  # [b, n_h, t_t, d_k] -> [b, d, t_t]
         return output, p_attn
 
+    def _chunked_attention(self, query, key, value, mask=None):
+        """
+        query/key/value: [b, h, t, d_k], self-attention only
+        ret: [b, h, t, d_k]
+        Relative embeddings are zero beyond window_size, so the relative
+        logits/weights only touch the band |j - i| <= window_size and are
+        scattered into / gathered from each block directly.
+        """
+        b, h, t, _ = query.size()
+        query = query / math.sqrt(self.k_channels)
+        output = torch.empty_like(query)
+        if self.window_size is not None:
+            offsets = torch.arange(
+                -self.window_size, self.window_size + 1, device=query.device
+            )
+        for start in range(0, t, self.chunk_size):
+            end = min(start + self.chunk_size, t)
+            q = query[:, :, start:end]
+            scores = torch.matmul(q, key.transpose(-2, -1))  # [b, h, c, t]
+            if self.window_size is not None:
+                cols = torch.arange(start, end, device=query.device)[:, None] + offsets
+                valid = ((cols >= 0) & (cols < t)).to(query.dtype)
+                cols = cols.clamp(0, t - 1)[None, None].expand(b, h, -1, -1)
+                rel_logits = self._matmul_with_relative_keys(q, self.emb_rel_k)
+                scores.scatter_add_(-1, cols, rel_logits * valid)
+            if mask is not None:
+                if mask.dim() == 3:
+                    block = mask[:, :, start:end].unsqueeze(-1) * mask.unsqueeze(2)
+                else:
+                    block = mask[:, :, start:end]
+                scores = scores.masked_fill(block == 0, -1e4)
+            p_attn = F.softmax(scores, dim=-1)
+            out = torch.matmul(p_attn, value)
+            if self.window_size is not None:
+                relative_weights = p_attn.gather(-1, cols) * valid
+                out = out + self._matmul_with_relative_values(
+                    relative_weights, self.emb_rel_v
+                )
+            output[:, :, start:end] = out
+        return output
+
     def _matmul_with_relative_values(self, x, y):
         """
         x: [b, h, l, m]
@@ -323,50 +323,40 @@ class SineGen(torch.nn.Module):
                   f0 for unvoiced steps should be 0
         output sine_tensor: tensor(batchsize=1, length, dim)
         output uv: tensor(batchsize=1, length, 1)
+
+        The phase is accumulated at frame rate and expanded to audio rate once:
+        with nearest upsampling every sample of frame j advances the phase by
+        rad[j], so sample i of frame j sits at start[j] + (i + 1) * rad[j].
         """
         with torch.no_grad():
-            f0 = f0[:, None].transpose(1, 2)
-            f0_buf = torch.zeros(f0.shape[0], f0.shape[1], self.dim, device=f0.device)
-            # fundamental component
-            f0_buf[:, :, 0] = f0[:, :, 0]
-            for idx in np.arange(self.harmonic_num):
-                f0_buf[:, :, idx + 1] = f0_buf[:, :, 0] * (
-                    idx + 2
-                )  # idx + 2: the (idx+1)-th overtone, (idx+2)-th harmonic
-            rad_values = (f0_buf / self.sampling_rate) % 1  ###%1意味着n_har的乘积无法后处理优化
-            rand_ini = torch.rand(
-                f0_buf.shape[0], f0_buf.shape[2], device=f0_buf.device
-            )
+            upp = int(upp)
+            f0 = f0[:, None].transpose(1, 2)  # [b, t, 1]
+            batch, frames = f0.shape[0], f0.shape[1]
+            harmonics = torch.arange(1, self.dim + 1, device=f0.device, dtype=f0.dtype)
+            rad_values = (f0 * harmonics / self.sampling_rate) % 1  # [b, t, dim]
+            rand_ini = torch.rand(batch, self.dim, device=f0.device, dtype=f0.dtype)
             rand_ini[:, 0] = 0
             rad_values[:, 0, :] = rad_values[:, 0, :] + rand_ini
-            tmp_over_one = torch.cumsum(rad_values, 1)  # % 1  #####%1意味着后面的cumsum无法再优化
-            tmp_over_one *= upp
-            tmp_over_one = F.interpolate(
-                tmp_over_one.transpose(2, 1),
-                scale_factor=upp,
-                mode="linear",
-                align_corners=True,
-            ).transpose(2, 1)
-            rad_values = F.interpolate(
-                rad_values.transpose(2, 1), scale_factor=upp, mode="nearest"
-            ).transpose(
-                2, 1
-            )  #######
-            tmp_over_one %= 1
-            tmp_over_one_idx = (tmp_over_one[:, 1:, :] - tmp_over_one[:, :-1, :]) < 0
-            cumsum_shift = torch.zeros_like(rad_values)
-            cumsum_shift[:, 1:, :] = tmp_over_one_idx * -1.0
-            sine_waves = torch.sin(
-                torch.cumsum(rad_values + cumsum_shift, dim=1) * 2 * np.pi
+            # Frame-rate phase at the start of every frame; kept in float64 where
+            # available so long chunks do not drift
+            acc_dtype = torch.float64 if f0.device.type in ("cpu", "cuda") else torch.float32
+            rad_acc = rad_values.to(acc_dtype)
+            phase_start = ((torch.cumsum(rad_acc, 1) - rad_acc) * upp % 1).to(f0.dtype)
+            ramp = torch.arange(1, upp + 1, device=f0.device, dtype=f0.dtype)
+            # The only full-rate allocations: sine_waves, noise and uv
+            sine_waves = torch.addcmul(
+                phase_start[:, :, None, :],
+                rad_values[:, :, None, :],
+                ramp[None, :, None],
             )
-            sine_waves = sine_waves * self.sine_amp
+            sine_waves.mul_(2 * np.pi).sin_().mul_(self.sine_amp)
             uv = self._f02uv(f0)
-            uv = F.interpolate(
-                uv.transpose(2, 1), scale_factor=upp, mode="nearest"
-            ).transpose(2, 1)
             noise_amp = uv * self.noise_std + (1 - uv) * self.sine_amp / 3
-            noise = noise_amp * torch.randn_like(sine_waves)
-            sine_waves = sine_waves * uv + noise
+            noise = torch.randn_like(sine_waves).mul_(noise_amp[:, :, None, :])
+            sine_waves.mul_(uv[:, :, None, :]).add_(noise)
+            sine_waves = sine_waves.view(batch, frames * upp, self.dim)
+            noise = noise.view(batch, frames * upp, self.dim)
+            uv = uv.repeat_interleave(upp, dim=1)
         return sine_waves, uv, noise
 
 
@@ -413,8 +403,8 @@ class SourceModuleHnNSF(torch.nn.Module):
 
     def forward(self, x, upp=None):
         sine_wavs, uv, _ = self.l_sin_gen(x, upp)
-        if self.is_half:
-            sine_wavs = sine_wavs.half()
+        # follow the weights' dtype (fp16, bf16 or fp32)
+        sine_wavs = sine_wavs.to(self.l_linear.weight.dtype)
         sine_merge = self.l_tanh(self.l_linear(sine_wavs))
         return sine_merge, None, None  # noise, uv
 
@@ -612,7 +602,8 @@ class SynthesizerTrnMs256NSFsid(nn.Module):
     def remove_weight_norm(self):
         self.dec.remove_weight_norm()
         self.flow.remove_weight_norm()
-        self.enc_q.remove_weight_norm()
+        if hasattr(self, "enc_q"):  # deleted for inference
+            self.enc_q.remove_weight_norm()
 
     def forward(
         self, phone, phone_lengths, pitch, pitchf, y, y_lengths, ds
@@ -728,7 +719,8 @@ class SynthesizerTrnMs768NSFsid(nn.Module):
     def remove_weight_norm(self):
         self.dec.remove_weight_norm()
         self.flow.remove_weight_norm()
-        self.enc_q.remove_weight_norm()
+        if hasattr(self, "enc_q"):  # deleted for inference
+            self.enc_q.remove_weight_norm()
 
     def forward(
         self, phone, phone_lengths, pitch, pitchf, y, y_lengths, ds
@@ -841,7 +833,8 @@ class SynthesizerTrnMs256NSFsid_nono(nn.Module):
     def remove_weight_norm(self):
         self.dec.remove_weight_norm()
         self.flow.remove_weight_norm()
-        self.enc_q.remove_weight_norm()
+        if hasattr(self, "enc_q"):  # deleted for inference
+            self.enc_q.remove_weight_norm()
 
     def forward(self, phone, phone_lengths, y, y_lengths, ds):  # 这里ds是id，[bs,1]
         g = self.emb_g(ds).unsqueeze(-1)  # [b, 256, 1]##1是t，广播的
@@ -947,7 +940,8 @@ class SynthesizerTrnMs768NSFsid_nono(nn.Module):
     def remove_weight_norm(self):
         self.dec.remove_weight_norm()
         self.flow.remove_weight_norm()
-        self.enc_q.remove_weight_norm()
+        if hasattr(self, "enc_q"):  # deleted for inference
+            self.enc_q.remove_weight_norm()
 
     def forward(self, phone, phone_lengths, y, y_lengths, ds):  # 这里ds是id，[bs,1]
         g = self.emb_g(ds).unsqueeze(-1)  # [b, 256, 1]##1是t，广播的
@@ -1,3 +1,6 @@
+import numpy as np
+
+
 class F0Predictor(object):
     def compute_f0(self, wav, p_len):
         """
@@ -14,3 +17,38 @@ class F0Predictor(object):
         output: f0:[signal_length//hop_length],uv:[signal_length//hop_length]
         """
         pass
+
+    def interpolate_f0(self, f0):
+        """
+        对F0进行插值处理
+        unvoiced gaps: leading -> first voiced value, inner -> linear ramp that
+        reaches the next voiced value one frame early, trailing -> last voiced
+        value. A gap followed only by the final frame counts as trailing and
+        overwrites that frame, as the original frame loop did.
+        """
+        data = np.reshape(f0, (f0.size,))
+        n = data.size
+        voiced = data > 0.0
+        vuv_vector = voiced.astype(np.float32)
+        if n >= 2 and voiced[-1] and not voiced[-2]:
+            voiced = voiced.copy()
+            voiced[-1] = False
+
+        ip_data = np.zeros_like(data)
+        idx = np.flatnonzero(voiced)
+        if idx.size == 0:
+            return ip_data, vuv_vector
+        ip_data[idx] = data[idx]
+
+        frames = np.arange(n)
+        prev = np.maximum.accumulate(np.where(voiced, frames, -1))
+        nxt = np.minimum.accumulate(np.where(voiced, frames, n)[::-1])[::-1]
+        gap = ~voiced
+        ip_data[gap & (prev < 0)] = data[idx[0]]
+        ip_data[gap & (nxt >= n)] = data[idx[-1]]
+        inner = gap & (prev >= 0) & (nxt < n)
+        a, b, k = prev[inner], nxt[inner], frames[inner]
+        step = (data[b] - data[a]) / (b - a - 1)
+        ip_data[inner] = data[a] + step * (k - a)
+
+        return ip_data, vuv_vector
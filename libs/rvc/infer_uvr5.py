@@ -11,107 +11,128 @@ import numpy as np
 import hashlib, math
 from tqdm import tqdm
 from lib.uvr5_pack.lib_v5 import spec_utils
-from lib.uvr5_pack.utils import _get_name_params, inference
+from lib.uvr5_pack.utils import _get_name_params, weights_hash, inference
 from lib.uvr5_pack.lib_v5.model_param_init import ModelParameters
 import soundfile as sf
+from audio_io import write_audio
 from lib.uvr5_pack.lib_v5.nets_new import CascadedNet
 from lib.uvr5_pack.lib_v5 import nets_61968KB as nets
 
 import argparse
+import threading
+from time import time as ttime
 
-# Создаем объект парсера
-parser = argparse.ArgumentParser(description='Process some paths.')
 
-# Добавляем аргументы
-parser.add_argument('--model_path', type=str, required=True, help='Path to the model')
-parser.add_argument('--audio_path', type=str, required=True, help='Path to the audio')
-parser.add_argument('--save_path', type=str, required=True, help='Path to save the output')
+# Process-wide UVR5 model pool: batch separation pays checkpoint loading and
+# ModelParameters parsing once per (weights, device, precision)
+_model_pool = {}
+_model_params = {}
+_pool_lock = threading.Lock()
+pool_stats = {"loads": 0, "hits": 0, "load_time": 0.0}
 
-# Разбираем аргументы
-args = parser.parse_args()
 
-# Теперь вы можете использовать эти аргументы в своем коде
-model_path = args.model_path
-audio_path = args.audio_path
-save_path = args.save_path
+def get_model_params(config_path):
+    with _pool_lock:
+        if config_path not in _model_params:
+            _model_params[config_path] = ModelParameters(config_path)
+        return _model_params[config_path]
 
 
-class _audio_pre_:
-    def __init__(self, agg, model_path, device, is_half):
-        self.model_path = model_path
-        self.device = device
-        self.data = {
-            # Processing Options
-            "postprocess": False,
-            "tta": False,
-            # Constants
-            "window_size": 512,
-            "agg": agg,
-            "high_end_process": "mirroring",
-        }
-        mp = ModelParameters("../libs/rvc/lib/uvr5_pack/lib_v5/modelparams/4band_v2.json")
-        model = nets.CascadedASPPNet(mp.param["bins"] * 2)
+def model_params_for(model_path, default):
+    """ModelParameters from name_params.json by weights hash, else the default JSON."""
+    try:
+        param_name, params_path = _get_name_params(model_path, weights_hash(model_path))
+    except KeyError:
+        return get_model_params(default)
+    # name_params.json paths are relative to libs/rvc; some entries name files we don't ship
+    params_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), params_path)
+    return get_model_params(params_path if os.path.exists(params_path) else default)
+
+
+def load_uvr5_model(model_path, device, is_half, build):
+    """Cached eval-mode model; build(cpk) constructs the network for a checkpoint."""
+    key = (os.path.abspath(model_path), str(device), "fp16" if is_half else "fp32")
+    with _pool_lock:
+        if key in _model_pool:
+            pool_stats["hits"] += 1
+            return _model_pool[key]
+        t0 = ttime()
         cpk = torch.load(model_path, map_location="cpu")
+        model = build(cpk)
         model.load_state_dict(cpk)
         model.eval()
         if is_half:
             model = model.half().to(device)
         else:
             model = model.to(device)
+        elapsed = ttime() - t0
+        pool_stats["loads"] += 1
+        pool_stats["load_time"] += elapsed
+        print("loaded uvr5 %s on %s in %.2fs" % (os.path.basename(model_path), device, elapsed))
+        _model_pool[key] = model
+        return model
 
-        self.mp = mp
-        self.model = model
 
-    def _path_audio_(self, music_file, ins_root=None, vocal_root=None, format="wav"):
-        if ins_root is None and vocal_root is None:
-            return "No save root."
-        name = os.path.basename(music_file)
-        if ins_root is not None:
-            os.makedirs(ins_root, exist_ok=True)
-        if vocal_root is not None:
-            os.makedirs(vocal_root, exist_ok=True)
-        X_wave, y_wave, X_spec_s, y_spec_s = {}, {}, {}, {}
+def clear_model_pool():
+    with _pool_lock:
+        _model_pool.clear()
+
+
+class _audio_pre_base:
+    """Shared separation path of the VR (_audio_pre_) and new (_audio_pre_new) models.
+
+    separate() works on arrays or file objects and returns arrays, so it can
+    feed voice conversion directly; _path_audio_ is the file-to-file wrapper.
+    """
+
+    # the DeEcho/DeReverb (new) models predict the vocal stem with the mask
+    # the VR models use for the instrumental
+    swap_stems = False
+
+    def load_wave(self, audio, sr=None):
+        """Stereo [2, T] float32 at the top band's rate from a path, a file object or an array."""
+        bp = self.mp.param["band"][len(self.mp.param["band"])]
+        if isinstance(audio, str):
+            X_wave, _ = librosa.core.load(  # 理论上librosa读取可能对某些音频有bug，应该上ffmpeg读取，但是太麻烦了弃坑
+                audio,
+                bp["sr"],
+                False,
+                dtype=np.float32,
+                res_type=bp["res_type"],
+            )
+        else:
+            if not isinstance(audio, np.ndarray):  # file-like
+                audio, sr = sf.read(audio, dtype="float32", always_2d=True)
+                audio = audio.T
+            if sr is None:
+                raise ValueError("sr is required for array input")
+            X_wave = np.asarray(audio, dtype=np.float32)
+            if X_wave.ndim == 2 and X_wave.shape[0] > 2:  # [T, C]
+                X_wave = X_wave.T
+            if sr != bp["sr"]:
+                X_wave = librosa.core.resample(X_wave, sr, bp["sr"], res_type=bp["res_type"])
+        if X_wave.ndim == 1 or X_wave.shape[0] == 1:
+            X_wave = np.asfortranarray([X_wave.reshape(-1), X_wave.reshape(-1)])
+        return X_wave
+
+    def separate(self, audio, sr=None, outputs=("instrument", "vocals")):
+        """Returns ({name: [T, 2] float wave}, sample rate) for the requested outputs.
+
+        Stems are labelled correctly for both model families.
+        """
+        X_wave = self.load_wave(audio, sr)
         bands_n = len(self.mp.param["band"])
-        # print(bands_n)
-        for d in range(bands_n, 0, -1):
-            bp = self.mp.param["band"][d]
-            if d == bands_n:  # high-end band
-                (
-                    X_wave[d],
-                    _,
-                ) = librosa.core.load(  # 理论上librosa读取可能对某些音频有bug，应该上ffmpeg读取，但是太麻烦了弃坑
-                    music_file,
-                    bp["sr"],
-                    False,
-                    dtype=np.float32,
-                    res_type=bp["res_type"],
-                )
-                if X_wave[d].ndim == 1:
-                    X_wave[d] = np.asfortranarray([X_wave[d], X_wave[d]])
-            else:  # lower bands
-                X_wave[d] = librosa.core.resample(
-                    X_wave[d + 1],
-                    self.mp.param["band"][d + 1]["sr"],
-                    bp["sr"],
-                    res_type=bp["res_type"],
-                )
-            # Stft of wave source
-            X_spec_s[d] = spec_utils.wave_to_spectrogram_mt(
-                X_wave[d],
-                bp["hl"],
-                bp["n_fft"],
-                self.mp.param["mid_side"],
-                self.mp.param["mid_side_b2"],
-                self.mp.param["reverse"],
+        bp = self.mp.param["band"][bands_n]
+        # all bands and both channels on the shared spec_utils pool
+        X_spec_s = spec_utils.wave_to_multiband_spectrogram(X_wave, self.mp)
+        del X_wave
+        if self.data["high_end_process"] != "none":  # high-end band
+            input_high_end_h = (bp["n_fft"] // 2 - bp["crop_stop"]) + (
+                self.mp.param["pre_filter_stop"] - self.mp.param["pre_filter_start"]
             )
-            # pdb.set_trace()
-            if d == bands_n and self.data["high_end_process"] != "none":
-                input_high_end_h = (bp["n_fft"] // 2 - bp["crop_stop"]) + (
-                    self.mp.param["pre_filter_stop"] - self.mp.param["pre_filter_start"]
-                )
-                input_high_end = X_spec_s[d][
-                    :, bp["n_fft"] // 2 - input_high_end_h : bp["n_fft"] // 2, :
-                ]
+            input_high_end = X_spec_s[bands_n][
+                :, bp["n_fft"] // 2 - input_high_end_h : bp["n_fft"] // 2, :
+            ]
 
         X_spec_m = spec_utils.combine_spectrograms(X_spec_s, self.mp)
         aggresive_set = float(self.data["agg"] / 100)
@@ -130,78 +151,44 @@ class _audio_pre_:
         y_spec_m = pred * X_phase
         v_spec_m = X_spec_m - y_spec_m
 
-        if ins_root is not None:
+        stems = (("instrument", y_spec_m), ("vocals", v_spec_m))
+        if self.swap_stems:
+            stems = (("vocals", y_spec_m), ("instrument", v_spec_m))
+        waves = {}
+        for stem, spec_m in stems:
+            if stem not in outputs:
+                continue
             if self.data["high_end_process"].startswith("mirroring"):
                 input_high_end_ = spec_utils.mirroring(
-                    self.data["high_end_process"], y_spec_m, input_high_end, self.mp
+                    self.data["high_end_process"], spec_m, input_high_end, self.mp
                 )
-                wav_instrument = spec_utils.cmb_spectrogram_to_wave(
-                    y_spec_m, self.mp, input_high_end_h, input_high_end_
+                waves[stem] = spec_utils.cmb_spectrogram_to_wave(
+                    spec_m, self.mp, input_high_end_h, input_high_end_
                 )
             else:
-                wav_instrument = spec_utils.cmb_spectrogram_to_wave(y_spec_m, self.mp)
-            print("%s instruments done" % name)
-            if format in ["wav", "flac"]:
-                sf.write(
-                    os.path.join(
-                        ins_root,
-                        "instrument_{}_{}.{}".format(name, self.data["agg"], format),
-                    ),
-                    (np.array(wav_instrument) * 32768).astype("int16"),
-                    self.mp.param["sr"],
-                )  #
-            else:
-                path = os.path.join(
-                    ins_root, "instrument_{}_{}.wav".format(name, self.data["agg"])
-                )
-                sf.write(
-                    path,
-                    (np.array(wav_instrument) * 32768).astype("int16"),
-                    self.mp.param["sr"],
-                )
-                if os.path.exists(path):
-                    os.system(
-                        "ffmpeg -i %s -vn %s -q:a 2 -y"
-                        % (path, path[:-4] + ".%s" % format)
-                    )
-        if vocal_root is not None:
-            if self.data["high_end_process"].startswith("mirroring"):
-                input_high_end_ = spec_utils.mirroring(
-                    self.data["high_end_process"], v_spec_m, input_high_end, self.mp
-                )
-                wav_vocals = spec_utils.cmb_spectrogram_to_wave(
-                    v_spec_m, self.mp, input_high_end_h, input_high_end_
-                )
-            else:
-                wav_vocals = spec_utils.cmb_spectrogram_to_wave(v_spec_m, self.mp)
-            print("%s vocals done" % name)
-            if format in ["wav", "flac"]:
-                sf.write(
-                    os.path.join(
-                        vocal_root,
-                        "(Vocals)_{}_{}.{}".format(name, self.data["agg"], format),
-                    ),
-                    (np.array(wav_vocals) * 32768).astype("int16"),
-                    self.mp.param["sr"],
-                )
-            else:
-                path = os.path.join(
-                    vocal_root, "(Vocals)_{}_{}.wav".format(name, self.data["agg"])
-                )
-                sf.write(
-                    path,
-                    (np.array(wav_vocals) * 32768).astype("int16"),
-                    self.mp.param["sr"],
-                )
-                if os.path.exists(path):
-                    os.system(
-                        "ffmpeg -i %s -vn %s -q:a 2 -y"
-                        % (path, path[:-4] + ".%s" % format)
-                    )
+                waves[stem] = spec_utils.cmb_spectrogram_to_wave(spec_m, self.mp)
+        return waves, self.mp.param["sr"]
+
+    def _save_stems_(self, music_file, ins_root, vocal_root, format):
+        if ins_root is None and vocal_root is None:
+            return "No save root."
+        name = os.path.basename(music_file)
+        roots = {"instrument": ins_root, "vocals": vocal_root}
+        waves, sr = self.separate(
+            music_file, outputs=[stem for stem, root in roots.items() if root is not None]
+        )
+        patterns = {"instrument": "instrument_{}_{}.{}", "vocals": "(Vocals)_{}_{}.{}"}
+        for stem, wave in waves.items():
+            os.makedirs(roots[stem], exist_ok=True)
+            path = os.path.join(
+                roots[stem], patterns[stem].format(name, self.data["agg"], format)
+            )
+            write_audio(path, wave, sr, format)
+            print("%s %s done" % (name, "instruments" if stem == "instrument" else stem))
 
 
-class _audio_pre_new:
-    def __init__(self, agg, model_path, device, is_half):
+class _audio_pre_(_audio_pre_base):
+    def __init__(self, agg, model_path, device, is_half, batch_size=4):
         self.model_path = model_path
         self.device = device
         self.data = {
@@ -210,172 +197,99 @@ class _audio_pre_new:
             "tta": False,
             # Constants
             "window_size": 512,
+            "batch_size": batch_size,
             "agg": agg,
             "high_end_process": "mirroring",
         }
-        mp = ModelParameters("../libs/rvc/lib/uvr5_pack/lib_v5/modelparams/4band_v3.json")
+        mp = model_params_for(
+            model_path, "../libs/rvc/lib/uvr5_pack/lib_v5/modelparams/4band_v2.json"
+        )
+        model = load_uvr5_model(
+            model_path,
+            device,
+            is_half,
+            lambda cpk: nets.CascadedASPPNet(mp.param["bins"] * 2),
+        )
+
+        self.mp = mp
+        self.model = model
+
+    def _path_audio_(self, music_file, ins_root=None, vocal_root=None, format="wav"):
+        return self._save_stems_(music_file, ins_root, vocal_root, format)
+
+
+class _audio_pre_new(_audio_pre_base):
+    swap_stems = True
+
+    def __init__(self, agg, model_path, device, is_half, batch_size=4):
+        self.model_path = model_path
+        self.device = device
+        self.data = {
+            # Processing Options
+            "postprocess": False,
+            "tta": False,
+            # Constants
+            "window_size": 512,
+            "batch_size": batch_size,
+            "agg": agg,
+            "high_end_process": "mirroring",
+        }
+        mp = model_params_for(
+            model_path, "../libs/rvc/lib/uvr5_pack/lib_v5/modelparams/4band_v3.json"
+        )
         nout = 64 if "DeReverb" in model_path else 48
-        model = CascadedNet(mp.param["bins"] * 2, nout)
-        cpk = torch.load(model_path, map_location="cpu")
-        model.load_state_dict(cpk)
-        model.eval()
-        if is_half:
-            model = model.half().to(device)
-        else:
-            model = model.to(device)
+        model = load_uvr5_model(
+            model_path,
+            device,
+            is_half,
+            lambda cpk: CascadedNet(mp.param["bins"] * 2, nout),
+        )
 
         self.mp = mp
         self.model = model
 
     def _path_audio_(
         self, music_file, vocal_root=None, ins_root=None, format="wav"
-    ):  # 3个VR模型vocal和ins是反的
-        if ins_root is None and vocal_root is None:
-            return "No save root."
-        name = os.path.basename(music_file)
-        if ins_root is not None:
-            os.makedirs(ins_root, exist_ok=True)
-        if vocal_root is not None:
-            os.makedirs(vocal_root, exist_ok=True)
-        X_wave, y_wave, X_spec_s, y_spec_s = {}, {}, {}, {}
-        bands_n = len(self.mp.param["band"])
-        # print(bands_n)
-        for d in range(bands_n, 0, -1):
-            bp = self.mp.param["band"][d]
-            if d == bands_n:  # high-end band
-                (
-                    X_wave[d],
-                    _,
-                ) = librosa.core.load(  # 理论上librosa读取可能对某些音频有bug，应该上ffmpeg读取，但是太麻烦了弃坑
-                    music_file,
-                    bp["sr"],
-                    False,
-                    dtype=np.float32,
-                    res_type=bp["res_type"],
-                )
-                if X_wave[d].ndim == 1:
-                    X_wave[d] = np.asfortranarray([X_wave[d], X_wave[d]])
-            else:  # lower bands
-                X_wave[d] = librosa.core.resample(
-                    X_wave[d + 1],
-                    self.mp.param["band"][d + 1]["sr"],
-                    bp["sr"],
-                    res_type=bp["res_type"],
-                )
-            # Stft of wave source
-            X_spec_s[d] = spec_utils.wave_to_spectrogram_mt(
-                X_wave[d],
-                bp["hl"],
-                bp["n_fft"],
-                self.mp.param["mid_side"],
-                self.mp.param["mid_side_b2"],
-                self.mp.param["reverse"],
-            )
-            # pdb.set_trace()
-            if d == bands_n and self.data["high_end_process"] != "none":
-                input_high_end_h = (bp["n_fft"] // 2 - bp["crop_stop"]) + (
-                    self.mp.param["pre_filter_stop"] - self.mp.param["pre_filter_start"]
-                )
-                input_high_end = X_spec_s[d][
-                    :, bp["n_fft"] // 2 - input_high_end_h : bp["n_fft"] // 2, :
-                ]
+    ):  # 3个VR模型vocal和ins是反的; separate() already relabels the stems
+        return self._save_stems_(music_file, ins_root, vocal_root, format)
 
-        X_spec_m = spec_utils.combine_spectrograms(X_spec_s, self.mp)
-        aggresive_set = float(self.data["agg"] / 100)
-        aggressiveness = {
-            "value": aggresive_set,
-            "split_bin": self.mp.param["band"][1]["crop_stop"],
-        }
-        with torch.no_grad():
-            pred, X_mag, X_phase = inference(
-                X_spec_m, self.device, self.model, aggressiveness, self.data
-            )
-        # Postprocess
-        if self.data["postprocess"]:
-            pred_inv = np.clip(X_mag - pred, 0, np.inf)
-            pred = spec_utils.mask_silence(pred, pred_inv)
-        y_spec_m = pred * X_phase
-        v_spec_m = X_spec_m - y_spec_m
 
-        if ins_root is not None:
-            if self.data["high_end_process"].startswith("mirroring"):
-                input_high_end_ = spec_utils.mirroring(
-                    self.data["high_end_process"], y_spec_m, input_high_end, self.mp
-                )
-                wav_instrument = spec_utils.cmb_spectrogram_to_wave(
-                    y_spec_m, self.mp, input_high_end_h, input_high_end_
-                )
-            else:
-                wav_instrument = spec_utils.cmb_spectrogram_to_wave(y_spec_m, self.mp)
-            print("%s instruments done" % name)
-            if format in ["wav", "flac"]:
-                sf.write(
-                    os.path.join(
-                        ins_root,
-                        "instrument_{}_{}.{}".format(name, self.data["agg"], format),
-                    ),
-                    (np.array(wav_instrument) * 32768).astype("int16"),
-                    self.mp.param["sr"],
-                )  #
-            else:
-                path = os.path.join(
-                    ins_root, "instrument_{}_{}.wav".format(name, self.data["agg"])
-                )
-                sf.write(
-                    path,
-                    (np.array(wav_instrument) * 32768).astype("int16"),
-                    self.mp.param["sr"],
-                )
-                if os.path.exists(path):
-                    os.system(
-                        "ffmpeg -i %s -vn %s -q:a 2 -y"
-                        % (path, path[:-4] + ".%s" % format)
-                    )
-        if vocal_root is not None:
-            if self.data["high_end_process"].startswith("mirroring"):
-                input_high_end_ = spec_utils.mirroring(
-                    self.data["high_end_process"], v_spec_m, input_high_end, self.mp
-                )
-                wav_vocals = spec_utils.cmb_spectrogram_to_wave(
-                    v_spec_m, self.mp, input_high_end_h, input_high_end_
-                )
-            else:
-                wav_vocals = spec_utils.cmb_spectrogram_to_wave(v_spec_m, self.mp)
-            print("%s vocals done" % name)
-            if format in ["wav", "flac"]:
-                sf.write(
-                    os.path.join(
-                        vocal_root,
-                        "(Vocals)_{}_{}.{}".format(name, self.data["agg"], format),
-                    ),
-                    (np.array(wav_vocals) * 32768).astype("int16"),
-                    self.mp.param["sr"],
-                )
-            else:
-                path = os.path.join(
-                    vocal_root, "(Vocals)_{}_{}.wav".format(name, self.data["agg"])
-                )
-                sf.write(
-                    path,
-                    (np.array(wav_vocals) * 32768).astype("int16"),
-                    self.mp.param["sr"],
-                )
-                if os.path.exists(path):
-                    os.system(
-                        "ffmpeg -i %s -vn %s -q:a 2 -y"
-                        % (path, path[:-4] + ".%s" % format)
-                    )
+if __name__ == "__main__":
+    # Создаем объект парсера
+    parser = argparse.ArgumentParser(description='Process some paths.')
 
+    # Добавляем аргументы
+    parser.add_argument('--model_path', type=str, required=True, help='Path to the model')
+    parser.add_argument('--audio_path', type=str, required=True, help='Path to the audio (a file or a folder of files)')
+    parser.add_argument('--save_path', type=str, required=True, help='Path to save the output')
+    parser.add_argument('--batch_size', type=int, default=4, help='UVR windows per forward pass')
+
+    # Разбираем аргументы
+    args = parser.parse_args()
+
+    # Теперь вы можете использовать эти аргументы в своем коде
+    model_path = args.model_path
+    audio_path = args.audio_path
+    save_path = args.save_path
 
-if __name__ == "__main__":
     device = "cuda"
     is_half = True
     # model_path = "uvr5_weights/2_HP-UVR.pth"
     # model_path = "uvr5_weights/VR-DeEchoDeReverb.pth"
     # model_path = "uvr5_weights/VR-DeEchoNormal.pth"
     # model_path = "uvr5_weights/5_HP-Karaoke-UVR.pth"
-    pre_fun = _audio_pre_(model_path=model_path, device=device, is_half=True,agg=10)
+    pre_fun = _audio_pre_(model_path=model_path, device=device, is_half=True,agg=10,batch_size=args.batch_size)
     # pre_fun = _audio_pre_new(model_path=model_path, device=device, is_half=True, agg=10)
     # audio_path = "G:\Dowload\Sati_Akura_-_Black_Out_(musmore.com).mp3"
     # save_path = "opt"
-    pre_fun._path_audio_(audio_path, save_path, save_path)
+    if os.path.isdir(audio_path):
+        audio_files = [os.path.join(audio_path, f) for f in sorted(os.listdir(audio_path))]
+    else:
+        audio_files = [audio_path]
+    t0 = ttime()
+    for audio_file in audio_files:
+        pre_fun._path_audio_(audio_file, save_path, save_path)
+    print(
+        "%d files in %.2fs, model loads %d (%.2fs), pool hits %d"
+        % (len(audio_files), ttime() - t0, pool_stats["loads"], pool_stats["load_time"], pool_stats["hits"])
+    )
@@ -2,19 +2,24 @@ import onnxruntime
 import librosa
 import numpy as np
 import soundfile
+import torch
+
+
+def get_providers(device):
+    if device == "cpu" or device is None:
+        return ["CPUExecutionProvider"]
+    elif device == "cuda":
+        return ["CUDAExecutionProvider", "CPUExecutionProvider"]
+    elif device == "dml":
+        return ["DmlExecutionProvider"]
+    else:
+        raise RuntimeError("Unsportted Device")
 
 
 class ContentVec:
     def __init__(self, vec_path="pretrained/vec-768-layer-12.onnx", device=None):
         print("load model(s) from {}".format(vec_path))
-        if device == "cpu" or device is None:
-            providers = ["CPUExecutionProvider"]
-        elif device == "cuda":
-            providers = ["CUDAExecutionProvider", "CPUExecutionProvider"]
-        elif device == "dml":
-            providers = ["DmlExecutionProvider"]
-        else:
-            raise RuntimeError("Unsportted Device")
+        providers = get_providers(device)
         self.model = onnxruntime.InferenceSession(vec_path, providers=providers)
 
     def __call__(self, wav):
@@ -31,6 +36,55 @@ class ContentVec:
         return logits.transpose(0, 2, 1)
 
 
+class OnnxHubert:
+    """HuBERT on ONNX Runtime with the fairseq interface VC.vc calls.
+
+    The exported graph already applies final_proj for v1 models.
+    """
+
+    def __init__(self, vec_path, device="cpu"):
+        self.vec = ContentVec(vec_path, device)
+
+    def extract_features(self, source, padding_mask=None, output_layer=None):
+        wav = source.detach().cpu().float().numpy()[0]
+        return (torch.from_numpy(self.vec(wav)),)
+
+    def final_proj(self, feats):
+        return feats
+
+
+class OnnxSynthesizer:
+    """NSF synthesizer on ONNX Runtime with the net_g.infer interface VC.vc calls."""
+
+    def __init__(self, model_path, device="cpu"):
+        self.model = onnxruntime.InferenceSession(
+            model_path, providers=get_providers(device)
+        )
+        meta = self.model.get_modelmeta().custom_metadata_map
+        self.if_f0 = int(meta.get("f0", 1))
+        if self.if_f0 != 1:
+            raise ValueError("%s: only f0 (NSF) models run on the ONNX backend" % model_path)
+        self.tgt_sr = int(meta["tgt_sr"])
+        self.version = meta["version"]
+        self.n_spk = int(meta["n_spk"])
+        self.inter_channels = int(meta.get("inter_channels", 192))
+        self.input_names = [i.name for i in self.model.get_inputs()]
+
+    def infer(self, phone, phone_lengths, pitch, nsff0, sid):
+        frames = phone.shape[1]
+        inputs = [
+            phone.detach().cpu().float().numpy(),
+            phone_lengths.detach().cpu().numpy().astype(np.int64),
+            pitch.detach().cpu().numpy().astype(np.int64),
+            nsff0.detach().cpu().float().numpy(),
+            sid.detach().cpu().numpy().astype(np.int64),
+            # same 0.66666 noise scale as SynthesizerTrnMs*NSFsid.infer
+            np.random.randn(1, self.inter_channels, frames).astype(np.float32) * 0.66666,
+        ]
+        audio = self.model.run(None, dict(zip(self.input_names, inputs)))[0]
+        return (torch.from_numpy(audio),)
+
+
 def get_f0_predictor(f0_predictor, hop_length, sampling_rate, **kargs):
     if f0_predictor == "pm":
         from lib.infer_pack.modules.F0Predictor.PMF0Predictor import PMF0Predictor
@@ -68,14 +122,7 @@ class OnnxRVC:
     ):
         vec_path = f"pretrained/{vec_path}.onnx"
         self.vec_model = ContentVec(vec_path, device)
-        if device == "cpu" or device is None:
-            providers = ["CPUExecutionProvider"]
-        elif device == "cuda":
-            providers = ["CUDAExecutionProvider", "CPUExecutionProvider"]
-        elif device == "dml":
-            providers = ["DmlExecutionProvider"]
-        else:
-            raise RuntimeError("Unsportted Device")
+        providers = get_providers(device)
         self.model = onnxruntime.InferenceSession(model_path, providers=providers)
         self.sampling_rate = sr
         self.hop_size = hop_size
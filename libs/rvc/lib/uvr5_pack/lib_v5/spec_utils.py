@@ -3,6 +3,25 @@ import numpy as np
 import soundfile as sf
 from tqdm import tqdm
 import json, math, hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from multiprocessing import cpu_count
+
+# Shared STFT/ISTFT workers. librosa/numpy FFTs release the GIL, so threads
+# scale across bands and channels; results travel through futures only.
+_pools = {}
+_pool_lock = threading.Lock()
+
+
+def get_pool(n_workers=None):
+    """Process-wide thread pool per size; n_workers defaults to min(8, cpu_count())."""
+    n_workers = n_workers or min(8, cpu_count())
+    with _pool_lock:
+        if n_workers not in _pools:
+            _pools[n_workers] = ThreadPoolExecutor(
+                n_workers, thread_name_prefix="spec_utils"
+            )
+        return _pools[n_workers]
 
 
 def crop_center(h1, h2):
@@ -47,11 +66,7 @@ def wave_to_spectrogram(
     return spec
 
 
-def wave_to_spectrogram_mt(
-    wave, hop_length, n_fft, mid_side=False, mid_side_b2=False, reverse=False
-):
-    import threading
-
+def split_channels(wave, mid_side=False, mid_side_b2=False, reverse=False):
     if reverse:
         wave_left = np.flip(np.asfortranarray(wave[0]))
         wave_right = np.flip(np.asfortranarray(wave[1]))
@@ -64,22 +79,80 @@ def wave_to_spectrogram_mt(
     else:
         wave_left = np.asfortranarray(wave[0])
         wave_right = np.asfortranarray(wave[1])
+    return wave_left, wave_right
+
+
+def merge_channels(wave_left, wave_right, mid_side=False, mid_side_b2=False, reverse=False):
+    if reverse:
+        return np.asfortranarray([np.flip(wave_left), np.flip(wave_right)])
+    elif mid_side:
+        return np.asfortranarray(
+            [np.add(wave_left, wave_right / 2), np.subtract(wave_left, wave_right / 2)]
+        )
+    elif mid_side_b2:
+        return np.asfortranarray(
+            [
+                np.add(wave_right / 1.25, 0.4 * wave_left),
+                np.subtract(wave_left / 1.25, 0.4 * wave_right),
+            ]
+        )
+    else:
+        return np.asfortranarray([wave_left, wave_right])
+
+
+def submit_stft(wave, hop_length, n_fft, mid_side=False, mid_side_b2=False, reverse=False, pool=None):
+    """Start the STFT of both channels; gather with spectrogram_result()."""
+    pool = pool or get_pool()
+    return [
+        pool.submit(librosa.stft, channel, n_fft=n_fft, hop_length=hop_length)
+        for channel in split_channels(wave, mid_side, mid_side_b2, reverse)
+    ]
 
-    def run_thread(**kwargs):
-        global spec_left
-        spec_left = librosa.stft(**kwargs)
 
-    thread = threading.Thread(
-        target=run_thread,
-        kwargs={"y": wave_left, "n_fft": n_fft, "hop_length": hop_length},
+def spectrogram_result(futures):
+    return np.asfortranarray([f.result() for f in futures])
+
+
+def wave_to_spectrogram_mt(
+    wave, hop_length, n_fft, mid_side=False, mid_side_b2=False, reverse=False
+):
+    return spectrogram_result(
+        submit_stft(wave, hop_length, n_fft, mid_side, mid_side_b2, reverse)
     )
-    thread.start()
-    spec_right = librosa.stft(wave_right, n_fft, hop_length=hop_length)
-    thread.join()
 
-    spec = np.asfortranarray([spec_left, spec_right])
 
-    return spec
+def wave_to_multiband_spectrogram(wave, mp, n_workers=None):
+    """All band spectrograms of a stereo wave sampled at the top band's sr.
+
+    The resampling chain stays sequential (each band is resampled from the one
+    above, as before); every band's STFTs start as soon as its wave exists, so
+    they overlap with the remaining resampling and with each other.
+    """
+    pool = get_pool(n_workers)
+    bands_n = len(mp.param["band"])
+    waves, futures = {}, {}
+    for d in range(bands_n, 0, -1):
+        bp = mp.param["band"][d]
+        if d == bands_n:
+            waves[d] = wave
+        else:
+            waves[d] = librosa.resample(
+                waves[d + 1],
+                mp.param["band"][d + 1]["sr"],
+                bp["sr"],
+                res_type=bp["res_type"],
+            )
+        futures[d] = submit_stft(
+            waves[d],
+            bp["hl"],
+            bp["n_fft"],
+            mp.param["mid_side"],
+            mp.param["mid_side_b2"],
+            mp.param["reverse"],
+            pool,
+        )
+        waves.pop(d + 1, None)
+    return {d: spectrogram_result(futures[d]) for d in futures}
 
 
 def combine_spectrograms(specs, mp):
@@ -309,111 +382,82 @@ def spectrogram_to_wave(spec, hop_length, mid_side, mid_side_b2, reverse):
 
 
 def spectrogram_to_wave_mt(spec, hop_length, mid_side, reverse, mid_side_b2):
-    import threading
-
-    spec_left = np.asfortranarray(spec[0])
-    spec_right = np.asfortranarray(spec[1])
-
-    def run_thread(**kwargs):
-        global wave_left
-        wave_left = librosa.istft(**kwargs)
-
-    thread = threading.Thread(
-        target=run_thread, kwargs={"stft_matrix": spec_left, "hop_length": hop_length}
+    pool = get_pool()
+    futures = [
+        pool.submit(librosa.istft, np.asfortranarray(spec[c]), hop_length=hop_length)
+        for c in range(2)
+    ]
+    return merge_channels(
+        futures[0].result(), futures[1].result(), mid_side, mid_side_b2, reverse
     )
-    thread.start()
-    wave_right = librosa.istft(spec_right, hop_length=hop_length)
-    thread.join()
-
-    if reverse:
-        return np.asfortranarray([np.flip(wave_left), np.flip(wave_right)])
-    elif mid_side:
-        return np.asfortranarray(
-            [np.add(wave_left, wave_right / 2), np.subtract(wave_left, wave_right / 2)]
-        )
-    elif mid_side_b2:
-        return np.asfortranarray(
-            [
-                np.add(wave_right / 1.25, 0.4 * wave_left),
-                np.subtract(wave_left / 1.25, 0.4 * wave_right),
-            ]
-        )
-    else:
-        return np.asfortranarray([wave_left, wave_right])
 
 
-def cmb_spectrogram_to_wave(spec_m, mp, extra_bins_h=None, extra_bins=None):
-    wave_band = {}
+def _band_channel_to_wave(spec_m, channel, d, offset, mp, extra_bins_h, extra_bins):
+    """Cut one band of one channel out of spec_m, filter it and ISTFT it."""
+    bp = mp.param["band"][d]
+    bands_n = len(mp.param["band"])
+    spec_s = np.zeros(shape=(1, bp["n_fft"] // 2 + 1, spec_m.shape[2]), dtype=complex)
+    h = bp["crop_stop"] - bp["crop_start"]
+    spec_s[0, bp["crop_start"] : bp["crop_stop"], :] = spec_m[
+        channel, offset : offset + h, :
+    ]
+    if d == bands_n:  # higher
+        if extra_bins_h:  # if --high_end_process bypass
+            max_bin = bp["n_fft"] // 2
+            spec_s[0, max_bin - extra_bins_h : max_bin, :] = extra_bins[
+                channel, :extra_bins_h, :
+            ]
+        if bp["hpf_start"] > 0:
+            spec_s = fft_hp_filter(spec_s, bp["hpf_start"], bp["hpf_stop"] - 1)
+    elif d == 1:  # lower
+        spec_s = fft_lp_filter(spec_s, bp["lpf_start"], bp["lpf_stop"])
+    else:  # mid
+        spec_s = fft_hp_filter(spec_s, bp["hpf_start"], bp["hpf_stop"] - 1)
+        spec_s = fft_lp_filter(spec_s, bp["lpf_start"], bp["lpf_stop"])
+    return librosa.istft(np.asfortranarray(spec_s[0]), hop_length=bp["hl"])
+
+
+def cmb_spectrogram_to_wave(spec_m, mp, extra_bins_h=None, extra_bins=None, n_workers=None):
+    """Inverse of combine_spectrograms.
+
+    Band/channel ISTFTs are independent and run on the shared pool (each task
+    builds its own band slice, so at most n_workers slices are alive); only the
+    low-to-high accumulation with resampling in between is sequential.
+    """
+    pool = get_pool(n_workers)
     bands_n = len(mp.param["band"])
+    futures = {}
     offset = 0
-
     for d in range(1, bands_n + 1):
         bp = mp.param["band"][d]
-        spec_s = np.ndarray(
-            shape=(2, bp["n_fft"] // 2 + 1, spec_m.shape[2]), dtype=complex
-        )
-        h = bp["crop_stop"] - bp["crop_start"]
-        spec_s[:, bp["crop_start"] : bp["crop_stop"], :] = spec_m[
-            :, offset : offset + h, :
+        futures[d] = [
+            pool.submit(
+                _band_channel_to_wave,
+                spec_m, c, d, offset, mp, extra_bins_h, extra_bins,
+            )
+            for c in range(2)
         ]
+        offset += bp["crop_stop"] - bp["crop_start"]
 
-        offset += h
+    for d in range(1, bands_n + 1):
+        bp = mp.param["band"][d]
+        band_wave = merge_channels(
+            futures[d][0].result(),
+            futures[d][1].result(),
+            mp.param["mid_side"],
+            mp.param["mid_side_b2"],
+            mp.param["reverse"],
+        )
         if d == bands_n:  # higher
-            if extra_bins_h:  # if --high_end_process bypass
-                max_bin = bp["n_fft"] // 2
-                spec_s[:, max_bin - extra_bins_h : max_bin, :] = extra_bins[
-                    :, :extra_bins_h, :
-                ]
-            if bp["hpf_start"] > 0:
-                spec_s = fft_hp_filter(spec_s, bp["hpf_start"], bp["hpf_stop"] - 1)
-            if bands_n == 1:
-                wave = spectrogram_to_wave(
-                    spec_s,
-                    bp["hl"],
-                    mp.param["mid_side"],
-                    mp.param["mid_side_b2"],
-                    mp.param["reverse"],
-                )
-            else:
-                wave = np.add(
-                    wave,
-                    spectrogram_to_wave(
-                        spec_s,
-                        bp["hl"],
-                        mp.param["mid_side"],
-                        mp.param["mid_side_b2"],
-                        mp.param["reverse"],
-                    ),
-                )
+            wave = band_wave if bands_n == 1 else np.add(wave, band_wave)
         else:
             sr = mp.param["band"][d + 1]["sr"]
             if d == 1:  # lower
-                spec_s = fft_lp_filter(spec_s, bp["lpf_start"], bp["lpf_stop"])
                 wave = librosa.resample(
-                    spectrogram_to_wave(
-                        spec_s,
-                        bp["hl"],
-                        mp.param["mid_side"],
-                        mp.param["mid_side_b2"],
-                        mp.param["reverse"],
-                    ),
-                    bp["sr"],
-                    sr,
-                    res_type="sinc_fastest",
+                    band_wave, bp["sr"], sr, res_type="sinc_fastest"
                 )
             else:  # mid
-                spec_s = fft_hp_filter(spec_s, bp["hpf_start"], bp["hpf_stop"] - 1)
-                spec_s = fft_lp_filter(spec_s, bp["lpf_start"], bp["lpf_stop"])
-                wave2 = np.add(
-                    wave,
-                    spectrogram_to_wave(
-                        spec_s,
-                        bp["hl"],
-                        mp.param["mid_side"],
-                        mp.param["mid_side_b2"],
-                        mp.param["reverse"],
-                    ),
-                )
+                wave2 = np.add(wave, band_wave)
                 # wave = librosa.core.resample(wave2, bp['sr'], sr, res_type="sinc_fastest")
                 wave = librosa.core.resample(wave2, bp["sr"], sr, res_type="scipy")
 
@@ -1,16 +1,58 @@
+import os
 import torch
 import numpy as np
 from tqdm import tqdm
 import json
+import hashlib
+from functools import lru_cache
 
+NAME_PARAMS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "name_params.json")
 
+
+@lru_cache(maxsize=None)
 def load_data(file_name: str = "./lib/uvr5_pack/name_params.json") -> dict:
+    """Parsed once per process; callers must not modify the result."""
     with open(file_name, "r") as f:
         data = json.load(f)
 
     return data
 
 
+@lru_cache(maxsize=None)
+def name_params_index(file_name: str = NAME_PARAMS) -> dict:
+    """hash_name -> (param_name, model_params), with the precedence of the old scan:
+    an "equivalent" entry wins, otherwise the last matching entry."""
+    data = load_data(file_name)
+    index, final = {}, set()
+    for type in list(data):
+        for model in list(data[type][0]):
+            for entry in data[type][0][model]:
+                hash_name = str(entry["hash_name"])
+                if hash_name in final:
+                    continue
+                index[hash_name] = (entry["param_name"], entry["model_params"])
+                if type == "equivalent":
+                    final.add(hash_name)
+    return index
+
+
+_weights_hashes = {}
+
+
+def weights_hash(model_path):
+    """md5 of the last 10 MB of the weights (UVR convention), cached by size and mtime."""
+    st = os.stat(model_path)
+    key = (os.path.abspath(model_path), st.st_size, st.st_mtime)
+    if key not in _weights_hashes:
+        with open(model_path, "rb") as f:
+            try:
+                f.seek(-10000 * 1024, 2)
+            except OSError:  # smaller than 10 MB
+                f.seek(0)
+            _weights_hashes[key] = hashlib.md5(f.read()).hexdigest()
+    return _weights_hashes[key]
+
+
 def make_padding(width, cropsize, offset):
     left = offset
     roi_size = cropsize - left * 2
@@ -24,34 +66,38 @@ def make_padding(width, cropsize, offset):
 def inference(X_spec, device, model, aggressiveness, data):
     """
     data ： dic configs
+    data["batch_size"] windows go through model.predict per forward pass;
+    with data["tta"] the shifted windows share the same batches.
     """
 
     def _execute(
-        X_mag_pad, roi_size, n_window, device, model, aggressiveness, is_half=True
+        X_mag_pad, roi_size, starts, device, model, aggressiveness, is_half=True
     ):
+        # starts: window offsets into X_mag_pad, one output slot of roi_size each
         model.eval()
+        window_size = data["window_size"]
+        batch_size = max(1, int(data.get("batch_size", 1)))
+        dtype = torch.float16 if is_half else torch.float32
+        n_channels, n_bins = X_mag_pad.shape[:2]
+        pred = np.empty((n_channels, n_bins, len(starts) * roi_size), np.float32)
+        # 预分配: 每批复用同一块host/device内存
+        batch = torch.empty(
+            (batch_size, n_channels, n_bins, window_size), dtype=torch.float32
+        )
+        batch_dev = batch.to(device=device, dtype=dtype)
+        X_mag_pad = torch.from_numpy(np.ascontiguousarray(X_mag_pad, np.float32))
         with torch.no_grad():
-            preds = []
-
-            iterations = [n_window]
-
-            total_iterations = sum(iterations)
-            for i in tqdm(range(n_window)):
-                start = i * roi_size
-                X_mag_window = X_mag_pad[
-                    None, :, :, start : start + data["window_size"]
-                ]
-                X_mag_window = torch.from_numpy(X_mag_window)
-                if is_half:
-                    X_mag_window = X_mag_window.half()
-                X_mag_window = X_mag_window.to(device)
-
-                pred = model.predict(X_mag_window, aggressiveness)
-
-                pred = pred.detach().cpu().numpy()
-                preds.append(pred[0])
-
-            pred = np.concatenate(preds, axis=2)
+            for b in tqdm(range(0, len(starts), batch_size)):
+                chunk = starts[b : b + batch_size]
+                n = len(chunk)
+                for j, start in enumerate(chunk):
+                    batch[j].copy_(X_mag_pad[:, :, start : start + window_size])
+                batch_dev[:n].copy_(batch[:n])
+                out = model.predict(batch_dev[:n], aggressiveness)
+                out = out.float().cpu().numpy()
+                for j in range(n):
+                    k = (b + j) * roi_size
+                    pred[:, :, k : k + roi_size] = out[j]
         return pred
 
     def preprocess(X_spec):
@@ -69,27 +115,27 @@ def inference(X_spec, device, model, aggressiveness, data):
     pad_l, pad_r, roi_size = make_padding(n_frame, data["window_size"], model.offset)
     n_window = int(np.ceil(n_frame / roi_size))
 
-    X_mag_pad = np.pad(X_mag_pre, ((0, 0), (0, 0), (pad_l, pad_r)), mode="constant")
-
     if list(model.state_dict().values())[0].dtype == torch.float16:
         is_half = True
     else:
         is_half = False
-    pred = _execute(
-        X_mag_pad, roi_size, n_window, device, model, aggressiveness, is_half
-    )
-    pred = pred[:, :, :n_frame]
 
+    # TTA windows are shifted by roi_size // 2; padding once for the shifted
+    # pass covers both, the plain windows just start roi_size // 2 later
+    shift = roi_size // 2 if data["tta"] else 0
+    X_mag_pad = np.pad(
+        X_mag_pre, ((0, 0), (0, 0), (pad_l + shift, pad_r + shift)), mode="constant"
+    )
+    starts = [shift + i * roi_size for i in range(n_window)]
     if data["tta"]:
-        pad_l += roi_size // 2
-        pad_r += roi_size // 2
-        n_window += 1
-
-        X_mag_pad = np.pad(X_mag_pre, ((0, 0), (0, 0), (pad_l, pad_r)), mode="constant")
+        starts += [i * roi_size for i in range(n_window + 1)]
+    pred_all = _execute(
+        X_mag_pad, roi_size, starts, device, model, aggressiveness, is_half
+    )
+    pred = pred_all[:, :, :n_frame]
 
-        pred_tta = _execute(
-            X_mag_pad, roi_size, n_window, device, model, aggressiveness, is_half
-        )
+    if data["tta"]:
+        pred_tta = pred_all[:, :, n_window * roi_size :]
         pred_tta = pred_tta[:, :, roi_size // 2 :]
         pred_tta = pred_tta[:, :, :n_frame]
 
@@ -99,22 +145,12 @@ def inference(X_spec, device, model, aggressiveness, data):
 
 
 def _get_name_params(model_path, model_hash):
-    data = load_data()
-    flag = False
-    ModelName = model_path
-    for type in list(data):
-        for model in list(data[type][0]):
-            for i in range(len(data[type][0][model])):
-                if str(data[type][0][model][i]["hash_name"]) == model_hash:
-                    flag = True
-                elif str(data[type][0][model][i]["hash_name"]) in ModelName:
-                    flag = True
-
-                if flag:
-                    model_params_auto = data[type][0][model][i]["model_params"]
-                    param_name_auto = data[type][0][model][i]["param_name"]
-                    if type == "equivalent":
-                        return param_name_auto, model_params_auto
-                    else:
-                        flag = False
-    return param_name_auto, model_params_auto
+    """(param_name, model_params) for a checkpoint; KeyError when name_params.json has no entry."""
+    index = name_params_index()
+    if model_hash in index:
+        return index[model_hash]
+    # hash names embedded in the file name
+    for hash_name in reversed(list(index)):
+        if hash_name in model_path:
+            return index[hash_name]
+    raise KeyError("no UVR5 model params for %s (%s)" % (model_path, model_hash))
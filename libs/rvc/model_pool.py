@@ -0,0 +1,316 @@
+"""
+One process, many characters: an LRU pool of loaded voices.
+
+A voice is a synthesizer plus its faiss index. The pool keeps the most
+recently used voices resident while they fit max_models and ram_budget;
+all of them share one HuBERT, one RMVPE and the f0 cache. run_jobs()
+groups the queue by voice so each model is loaded once per batch:
+
+python libs/rvc/model_pool.py jobs.json
+
+jobs.json holds the Config/pool settings, the worker number and
+count, and a "jobs" list of {input_path, opt_path, model_path,
+index_path, f0up_key, resample_sr, bitrate, ...}; the extension of
+opt_path picks the output format (audio_io.write_audio). Several of
+these processes can run side by side, each with its own characters and
+share of RAM and cores; outputs only depend on the job.
+"""
+import os, sys
+import json
+import itertools
+from collections import OrderedDict
+from time import time as ttime
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import torch
+
+from config import Config, available_memory, resolve_device
+from vc_infer_pipeline import VC
+from synth_pack import load_synthesizer
+from onnx_export import ensure_exported
+
+HUBERT_PATH = "rvc_models/hubert_base.pt"
+
+
+def load_hubert(config, version, hubert_path=HUBERT_PATH):
+    if config.backend == "onnx":
+        from infer_pack.onnx_inference import OnnxHubert
+
+        vec_path = ensure_exported(
+            "hubert",
+            hubert_path,
+            os.path.splitext(hubert_path)[0] + "_%s.onnx" % version,
+            version=version,
+        )
+        return OnnxHubert(vec_path, "cpu")
+    from fairseq import checkpoint_utils
+
+    models, saved_cfg, task = checkpoint_utils.load_model_ensemble_and_task([hubert_path], suffix="")
+    hubert_model = models[0].to(config.device).to(config.dtype)
+    hubert_model.eval()
+    if config.quantize:
+        from quantize import quantize_hubert
+
+        hubert_model = quantize_hubert(hubert_model)
+    return hubert_model
+
+
+def load_net_g(config, model_path):
+    """(net_g, tgt_sr, version, if_f0) for a .pth, an inference pack or an .onnx."""
+    if config.backend == "onnx":
+        from infer_pack.onnx_inference import OnnxSynthesizer
+
+        if not model_path.endswith(".onnx"):
+            model_path = ensure_exported("synth", model_path, os.path.splitext(model_path)[0] + ".onnx")
+        print("loading onnx %s" % model_path)
+        # export_synthesizer/OnnxSynthesizer raise ValueError for models without f0
+        net_g = OnnxSynthesizer(model_path, "cpu")
+        return net_g, net_g.tgt_sr, net_g.version, net_g.if_f0
+    print("loading pth %s" % model_path)
+    net_g, cpt = load_synthesizer(model_path, config.device, config.is_half, config.dtype)
+    if config.attn_chunk:
+        net_g.enc_p.encoder.set_attention_chunk(config.attn_chunk)
+    if config.quantize:
+        from quantize import quantize_synthesizer
+
+        net_g = quantize_synthesizer(net_g)
+    return net_g, cpt["config"][-1], cpt.get("version", "v1"), cpt.get("f0", 1)
+
+
+def resident_bytes(net_g, model_path):
+    """Weights held by a synthesizer (the model file size for ONNX sessions)."""
+    if not isinstance(net_g, torch.nn.Module):
+        return os.path.getsize(model_path)
+    return sum(
+        t.numel() * t.element_size()
+        for t in itertools.chain(net_g.parameters(), net_g.buffers())
+    )
+
+
+class ModelPool(object):
+    """Loaded voices keyed on (model_path, index_path), least recently used first.
+
+    Adding a voice evicts from the front until at most max_models stay
+    resident and their weights plus index vectors fit ram_budget (bytes,
+    default half of the RAM available at start). The newest voice is
+    never evicted, so a single model larger than the budget still runs.
+    """
+
+    def __init__(self, config, max_models=4, ram_budget=None, hubert_path=HUBERT_PATH):
+        self.config = config
+        self.max_models = max(1, max_models)
+        self.ram_budget = ram_budget if ram_budget is not None else available_memory() // 2
+        self.hubert_path = hubert_path
+        # one HuBERT for torch; the ONNX export is per output layer (version)
+        self.hubert_models = {}
+        self.rmvpe_models = {}
+        self.index_cache = {}
+        self.vcs = {}
+        self.voices = OrderedDict()
+        self.nbytes = 0
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0, "load_time": 0.0}
+
+    def hubert(self, version):
+        key = version if self.config.backend == "onnx" else "torch"
+        if key not in self.hubert_models:
+            t0 = ttime()
+            self.hubert_models[key] = load_hubert(self.config, version, self.hubert_path)
+            self.stats["load_time"] += ttime() - t0
+        return self.hubert_models[key]
+
+    def get_vc(self, tgt_sr):
+        """One VC per target rate, all sharing the RMVPE models and index cache."""
+        if tgt_sr not in self.vcs:
+            vc = VC(tgt_sr, self.config)
+            vc.rmvpe_models = self.rmvpe_models
+            vc.index_cache = self.index_cache
+            self.vcs[tgt_sr] = vc
+        return self.vcs[tgt_sr]
+
+    def get(self, model_path, index_path=""):
+        key = (model_path, index_path)
+        voice = self.voices.get(key)
+        if voice is not None:
+            self.stats["hits"] += 1
+            self.voices.move_to_end(key)
+            return voice
+        self.stats["misses"] += 1
+        t0 = ttime()
+        net_g, tgt_sr, version, if_f0 = load_net_g(self.config, model_path)
+        vc = self.get_vc(tgt_sr)
+        index, big_npy = vc.load_index(index_path)
+        self.stats["load_time"] += ttime() - t0
+        nbytes = resident_bytes(net_g, model_path)
+        if big_npy is not None:
+            nbytes += 2 * big_npy.nbytes  # the index keeps its own copy of the vectors
+        voice = {
+            "net_g": net_g,
+            "tgt_sr": tgt_sr,
+            "version": version,
+            "if_f0": if_f0,
+            "vc": vc,
+            "nbytes": nbytes,
+        }
+        self.voices[key] = voice
+        self.nbytes += nbytes
+        self.evict()
+        return voice
+
+    def evict(self):
+        while len(self.voices) > 1 and (
+            len(self.voices) > self.max_models or self.nbytes > self.ram_budget
+        ):
+            (model_path, index_path), voice = self.voices.popitem(last=False)
+            self.nbytes -= voice["nbytes"]
+            self.stats["evictions"] += 1
+            if all(key[1] != index_path for key in self.voices):
+                self.index_cache.pop(index_path, None)
+            print("evicted %s" % model_path)
+        if torch.cuda.is_available():
+            torch.cuda.empty_cache()
+
+    def convert(
+        self,
+        model_path,
+        index_path,
+        input_path,
+        f0up_key=0,
+        f0method="rmvpe",
+        index_rate=0.5,
+        filter_radius=3,
+        resample_sr=0,
+        rms_mix_rate=1,
+        protect=0.33,
+        crepe_hop_length=128,
+        f0_minimum=50,
+        f0_maximum=1100,
+        autotune_enable=False,
+        sid=0,
+    ):
+        """Convert one file. Returns (sample rate, int16 audio)."""
+        from my_utils import load_audio
+
+        if "rmvpe_onnx" in f0method or (self.config.backend == "onnx" and "rmvpe" in f0method):
+            ensure_exported("rmvpe", self.config.rmvpe_path, self.config.rmvpe_onnx_path)
+        voice = self.get(model_path, index_path)
+        hubert_model = self.hubert(voice["version"])
+        audio = load_audio(input_path, 16000)
+        times = [0, 0, 0]
+        audio_opt = voice["vc"].pipeline(
+            hubert_model, voice["net_g"], sid, audio, input_path, times, int(f0up_key),
+            f0method, index_path, index_rate, voice["if_f0"], filter_radius, voice["tgt_sr"],
+            resample_sr, rms_mix_rate, voice["version"], protect, crepe_hop_length,
+            f0_autotune=autotune_enable, rmvpe_onnx=False, f0_max=f0_maximum, f0_min=f0_minimum,
+        )
+        print(times)
+        sr = resample_sr if resample_sr >= 16000 else voice["tgt_sr"]
+        return sr, audio_opt
+
+    def report(self):
+        stats = self.stats
+        print(
+            "model pool: %d hits, %d misses, %d evictions, %.1f s loading, %d resident (%.0f MB)"
+            % (
+                stats["hits"],
+                stats["misses"],
+                stats["evictions"],
+                stats["load_time"],
+                len(self.voices),
+                self.nbytes / 2**20,
+            )
+        )
+        return stats
+
+
+def group_jobs(jobs):
+    """Jobs grouped by voice, groups in order of first appearance, order kept inside."""
+    groups = OrderedDict()
+    for job in jobs:
+        groups.setdefault((job["model_path"], job.get("index_path", "")), []).append(job)
+    return [job for group in groups.values() for job in group]
+
+
+def cpu_budget(worker, workers):
+    """(threads, cores) for worker k of n: an equal slice of the cores this process may use."""
+    if hasattr(os, "sched_getaffinity"):
+        allowed = sorted(os.sched_getaffinity(0))
+    else:
+        allowed = list(range(os.cpu_count() or 1))
+    threads = max(1, len(allowed) // workers)
+    if threads * workers > len(allowed):
+        return threads, None
+    return threads, allowed[worker * threads : (worker + 1) * threads]
+
+
+def set_thread_budget(threads, cores=None):
+    """Size torch's intra-op pool for one worker and pin it to cores (where supported)."""
+    if cores and hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, cores)
+    if threads:
+        # inherited by spawned world_f0 workers
+        os.environ["OMP_NUM_THREADS"] = os.environ["MKL_NUM_THREADS"] = str(threads)
+        torch.set_num_threads(threads)
+        try:
+            torch.set_num_interop_threads(1)
+        except RuntimeError:  # only settable before the first parallel op
+            pass
+
+
+def run_jobs(
+    jobs,
+    device="cuda:0",
+    is_half=True,
+    precision=None,
+    max_models=4,
+    ram_budget=None,
+    worker=0,
+    workers=1,
+):
+    """Convert every job, one pool per (backend, quantize) setting.
+
+    This is worker k of n running side by side (see infer_files(parallel=...)):
+    it gets 1/n of ram_budget (default half the available RAM), split
+    evenly between its pools, and, when inference resolves to the CPU, 1/n
+    of the allowed cores.
+    """
+    from tqdm import tqdm
+
+    from audio_io import write_audio
+
+    threads = None
+    on_cpu = resolve_device(device) == "cpu" or any(
+        job.get("backend", "torch") == "onnx" for job in jobs
+    )
+    if workers > 1 and on_cpu:
+        threads, cores = cpu_budget(worker, workers)
+        set_thread_budget(threads, cores)
+    if ram_budget is None:
+        ram_budget = available_memory() // 2
+    settings = {(job.get("backend", "torch"), job.get("quantize", False)) for job in jobs}
+    ram_budget //= workers * max(1, len(settings))
+    pools = {}
+    for job in tqdm(group_jobs(jobs), desc="Converting"):
+        job = dict(job)
+        opt_path = job.pop("opt_path")
+        bitrate = job.pop("bitrate", None)
+        setting = (job.pop("backend", "torch"), job.pop("quantize", False))
+        if setting not in pools:
+            config = Config(
+                device, is_half, setting[0], setting[1], precision,
+                onnx_threads=threads, n_cpu=threads or 0,
+            )
+            pools[setting] = ModelPool(config, max_models, ram_budget)
+        sr, audio_opt = pools[setting].convert(**job)
+        # format from the extension, encoded straight from the int16 buffer
+        write_audio(opt_path, audio_opt, sr, bitrate=bitrate)
+    for pool in pools.values():
+        pool.report()
+    return pools
+
+
+if __name__ == "__main__":
+    sys.stdout = open(sys.stdout.fileno(), mode="w", encoding="utf-8", buffering=1)
+    with open(sys.argv[1], "r", encoding="utf-8") as f:
+        settings = json.load(f)
+    run_jobs(**settings)
@@ -0,0 +1,171 @@
+"""
+ONNX export for the three networks of the RVC path: HuBERT/ContentVec,
+RMVPE and the NSF synthesizer (from infer_pack/models_onnx.py).
+
+python libs/rvc/onnx_export.py synth model.pth model.onnx
+python libs/rvc/onnx_export.py hubert rvc_models/hubert_base.pt rvc_models/hubert_base_v2.onnx --version v2
+python libs/rvc/onnx_export.py rmvpe rvc_models/rmvpe.pt rvc_models/rmvpe.onnx
+"""
+import os, sys
+import argparse
+
+import torch
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+OPSET = 17
+
+
+def add_metadata(path, metadata):
+    """Store model facts (tgt_sr, version, ...) in the ONNX file itself."""
+    import onnx
+
+    model = onnx.load(path)
+    for key, value in metadata.items():
+        entry = model.metadata_props.add()
+        entry.key = key
+        entry.value = str(value)
+    onnx.save(model, path)
+
+
+def export_synthesizer(model_path, out_path):
+    from infer_pack.models_onnx import SynthesizerTrnMsNSFsidM
+
+    cpt = torch.load(model_path, map_location="cpu")
+    if cpt.get("f0", 1) != 1:
+        raise ValueError(
+            "%s has no f0 (NSF) branch; the ONNX backend only supports f0 models, use backend torch"
+            % model_path
+        )
+    cpt["config"][-3] = cpt["weight"]["emb_g.weight"].shape[0]  # n_spk
+    version = cpt.get("version", "v1")
+    vec_channels = 256 if version == "v1" else 768
+
+    net_g = SynthesizerTrnMsNSFsidM(*cpt["config"], is_half=False, version=version)
+    net_g.load_state_dict(cpt["weight"], strict=False)
+    net_g.remove_weight_norm()
+    del net_g.enc_q
+    net_g.eval()
+
+    frames = 200
+    test_phone = torch.rand(1, frames, vec_channels)
+    test_phone_lengths = torch.tensor([frames]).long()
+    test_pitch = torch.randint(size=(1, frames), low=5, high=255)
+    test_pitchf = torch.rand(1, frames)
+    test_ds = torch.LongTensor([0])
+    test_rnd = torch.rand(1, 192, frames)
+    input_names = ["phone", "phone_lengths", "pitch", "pitchf", "ds", "rnd"]
+    with torch.no_grad():
+        torch.onnx.export(
+            net_g,
+            (test_phone, test_phone_lengths, test_pitch, test_pitchf, test_ds, test_rnd),
+            out_path,
+            dynamic_axes={
+                "phone": [1],
+                "pitch": [1],
+                "pitchf": [1],
+                "rnd": [2],
+            },
+            do_constant_folding=False,
+            opset_version=OPSET,
+            verbose=False,
+            input_names=input_names,
+            output_names=["audio"],
+        )
+    add_metadata(
+        out_path,
+        {
+            "tgt_sr": cpt["config"][-1],
+            "version": version,
+            "f0": 1,
+            "n_spk": cpt["config"][-3],
+            "inter_channels": cpt["config"][2],
+        },
+    )
+    return out_path
+
+
+class HubertExport(torch.nn.Module):
+    """Wraps fairseq HuBERT to the ContentVec ONNX layout: [1, 1, T] -> [1, C, T']."""
+
+    def __init__(self, hubert, version):
+        super().__init__()
+        self.hubert = hubert
+        self.version = version
+
+    def forward(self, source):
+        source = source.squeeze(1)
+        feats = self.hubert.extract_features(
+            source=source,
+            padding_mask=None,
+            output_layer=9 if self.version == "v1" else 12,
+        )[0]
+        if self.version == "v1":
+            feats = self.hubert.final_proj(feats)
+        return feats.transpose(1, 2)
+
+
+def export_hubert(hubert_path, out_path, version):
+    from fairseq import checkpoint_utils
+
+    models, _, _ = checkpoint_utils.load_model_ensemble_and_task([hubert_path], suffix="")
+    model = HubertExport(models[0].float().eval(), version).eval()
+    test_source = torch.rand(1, 1, 16000)
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            (test_source,),
+            out_path,
+            dynamic_axes={"source": [2], "feats": [2]},
+            opset_version=OPSET,
+            input_names=["source"],
+            output_names=["feats"],
+        )
+    add_metadata(out_path, {"version": version})
+    return out_path
+
+
+def export_rmvpe(model_path, out_path):
+    from rmvpe import E2E
+
+    model = E2E(4, 1, (2, 2))
+    model.load_state_dict(torch.load(model_path, map_location="cpu"))
+    model.eval()
+    # RMVPE.mel2hidden pads the mel to a multiple of 32 frames
+    test_mel = torch.rand(1, 128, 32 * 10)
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            (test_mel,),
+            out_path,
+            dynamic_axes={"mel": [2], "hidden": [1]},
+            opset_version=OPSET,
+            input_names=["mel"],
+            output_names=["hidden"],
+        )
+    return out_path
+
+
+def ensure_exported(kind, src_path, out_path, **kwargs):
+    """Export on first use; later runs reuse the .onnx next to the source model."""
+    if not os.path.exists(out_path) or os.path.getmtime(out_path) < os.path.getmtime(src_path):
+        print("exporting %s %s -> %s" % (kind, src_path, out_path))
+        {"synth": export_synthesizer, "hubert": export_hubert, "rmvpe": export_rmvpe}[kind](
+            src_path, out_path, **kwargs
+        )
+    return out_path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export RVC networks to ONNX")
+    parser.add_argument("kind", choices=["synth", "hubert", "rmvpe"])
+    parser.add_argument("src_path")
+    parser.add_argument("out_path")
+    parser.add_argument("--version", default="v2", choices=["v1", "v2"])
+    args = parser.parse_args()
+    if args.kind == "synth":
+        export_synthesizer(args.src_path, args.out_path)
+    elif args.kind == "hubert":
+        export_hubert(args.src_path, args.out_path, args.version)
+    else:
+        export_rmvpe(args.src_path, args.out_path)
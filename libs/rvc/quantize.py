@@ -0,0 +1,68 @@
+"""
+Dynamic int8 quantization for CPU inference.
+
+torch.quantization.quantize_dynamic only handles nn.Linear / nn.GRU, so the
+1x1 q/k/v/o convolutions and the FFN convolutions of TextEncoder256/768 are
+first rewritten as equivalent Linear layers. Only the fp32 CPU path is
+supported; convolutional parts (DeepUnet, the NSF generator) stay fp32.
+"""
+import torch
+from torch import nn
+
+
+class Conv1dAsLinear(nn.Module):
+    """Stride-1, unpadded Conv1d computed as a Linear over unfolded frames."""
+
+    def __init__(self, conv):
+        super().__init__()
+        assert conv.stride == (1,) and conv.dilation == (1,) and conv.groups == 1
+        assert conv.padding == (0,) or conv.padding == 0
+        self.kernel_size = conv.kernel_size[0]
+        out_channels, in_channels, _ = conv.weight.shape
+        self.linear = nn.Linear(in_channels * self.kernel_size, out_channels, bias=conv.bias is not None)
+        with torch.no_grad():
+            self.linear.weight.copy_(conv.weight.reshape(out_channels, -1))
+            if conv.bias is not None:
+                self.linear.bias.copy_(conv.bias)
+
+    def forward(self, x):  # [b, c, t]
+        if self.kernel_size == 1:
+            return self.linear(x.transpose(1, 2)).transpose(1, 2)
+        frames = x.unfold(2, self.kernel_size, 1)  # [b, c, t', k]
+        frames = frames.permute(0, 2, 1, 3).reshape(x.shape[0], frames.shape[2], -1)
+        return self.linear(frames).transpose(1, 2)
+
+
+def convs_to_linear(encoder):
+    """Rewrite the attention and FFN convolutions of an attentions.Encoder in place."""
+    for attn in encoder.attn_layers:
+        for name in ("conv_q", "conv_k", "conv_v", "conv_o"):
+            setattr(attn, name, Conv1dAsLinear(getattr(attn, name)))
+    for ffn in encoder.ffn_layers:
+        ffn.conv_1 = Conv1dAsLinear(ffn.conv_1)
+        ffn.conv_2 = Conv1dAsLinear(ffn.conv_2)
+    return encoder
+
+
+def quantize_dynamic(model, layers=(nn.Linear,)):
+    return torch.quantization.quantize_dynamic(
+        model.float().cpu(), set(layers), dtype=torch.qint8
+    )
+
+
+def quantize_hubert(hubert_model):
+    """fairseq HuBERT: transformer projections and FFNs are nn.Linear."""
+    return quantize_dynamic(hubert_model, (nn.Linear,))
+
+
+def quantize_rmvpe(e2e):
+    """RMVPE E2E: BiGRU and the output Linear."""
+    return quantize_dynamic(e2e, (nn.GRU, nn.Linear))
+
+
+def quantize_synthesizer(net_g):
+    """SynthesizerTrnMs*NSFsid: attention/FFN of enc_p plus emb_phone."""
+    net_g = net_g.float().cpu()
+    convs_to_linear(net_g.enc_p.encoder)
+    net_g.enc_p = quantize_dynamic(net_g.enc_p, (nn.Linear,))
+    return net_g
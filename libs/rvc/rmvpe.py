@@ -6,6 +6,8 @@ import numpy as np
 import torch.nn.functional as F
 from scipy.signal import get_window
 from librosa.util import pad_center, tiny, normalize
+from functools import lru_cache
+import os
 
 
 ###stft codes from https://github.com/pseeth/torch-stft/blob/master/torch_stft/util.py
@@ -60,6 +62,33 @@ def window_sumsquare(
     return x
 
 
+@lru_cache(maxsize=None)
+def stft_bases(filter_length, hop_length, win_length, window):
+    """Windowed Fourier bases for the conv1d STFT, built once per process."""
+    scale = filter_length / hop_length
+    fourier_basis = np.fft.fft(np.eye(filter_length))
+
+    cutoff = int((filter_length / 2 + 1))
+    fourier_basis = np.vstack(
+        [np.real(fourier_basis[:cutoff, :]), np.imag(fourier_basis[:cutoff, :])]
+    )
+    forward_basis = torch.FloatTensor(fourier_basis[:, None, :])
+    inverse_basis = torch.FloatTensor(
+        np.linalg.pinv(scale * fourier_basis).T[:, None, :]
+    )
+
+    assert filter_length >= win_length
+    # get window and zero center pad it to filter_length
+    fft_window = get_window(window, win_length, fftbins=True)
+    fft_window = pad_center(fft_window, size=filter_length)
+    fft_window = torch.from_numpy(fft_window).float()
+
+    # window the bases
+    forward_basis *= fft_window
+    inverse_basis *= fft_window
+    return forward_basis, inverse_basis
+
+
 class STFT(torch.nn.Module):
     def __init__(
         self, filter_length=1024, hop_length=512, win_length=None, window="hann"
@@ -86,28 +115,10 @@ class STFT(torch.nn.Module):
         self.window = window
         self.forward_transform = None
         self.pad_amount = int(self.filter_length / 2)
-        scale = self.filter_length / self.hop_length
-        fourier_basis = np.fft.fft(np.eye(self.filter_length))
-
-        cutoff = int((self.filter_length / 2 + 1))
-        fourier_basis = np.vstack(
-            [np.real(fourier_basis[:cutoff, :]), np.imag(fourier_basis[:cutoff, :])]
-        )
-        forward_basis = torch.FloatTensor(fourier_basis[:, None, :])
-        inverse_basis = torch.FloatTensor(
-            np.linalg.pinv(scale * fourier_basis).T[:, None, :]
+        forward_basis, inverse_basis = stft_bases(
+            filter_length, hop_length, self.win_length, window
         )
 
-        assert filter_length >= self.win_length
-        # get window and zero center pad it to filter_length
-        fft_window = get_window(window, self.win_length, fftbins=True)
-        fft_window = pad_center(fft_window, size=filter_length)
-        fft_window = torch.from_numpy(fft_window).float()
-
-        # window the bases
-        forward_basis *= fft_window
-        inverse_basis *= fft_window
-
         self.register_buffer("forward_basis", forward_basis.float())
         self.register_buffer("inverse_basis", inverse_basis.float())
 
@@ -491,8 +502,13 @@ class MelSpectrogram(torch.nn.Module):
         mel_fmin=0,
         mel_fmax=None,
         clamp=1e-5,
+        stft_mode="fft",
     ):
         super().__init__()
+        # "fft": torch.stft, O(N log N) per frame; "conv": conv1d against the
+        # Fourier basis, kept for backends without torch.stft (DirectML)
+        self.stft_mode = stft_mode
+        self.stft_cache = {}
         n_fft = win_length if n_fft is None else n_fft
         self.hann_window = {}
         mel_basis = mel(
@@ -524,28 +540,29 @@ class MelSpectrogram(torch.nn.Module):
                 # "cpu"if(audio.device.type=="privateuseone") else audio.device
                 audio.device
             )
-        # fft = torch.stft(#doesn't support pytorch_dml
-        #     # audio.cpu() if(audio.device.type=="privateuseone")else audio,
-        #     audio,
-        #     n_fft=n_fft_new,
-        #     hop_length=hop_length_new,
-        #     win_length=win_length_new,
-        #     window=self.hann_window[keyshift_key],
-        #     center=center,
-        #     return_complex=True,
-        # )
-        # magnitude = torch.sqrt(fft.real.pow(2) + fft.imag.pow(2))
-        # print(1111111111)
-        # print(222222222222222,audio.device,self.is_half)
-        if hasattr(self, "stft") == False:
-            # print(n_fft_new,hop_length_new,win_length_new,audio.shape)
-            self.stft = STFT(
-                filter_length=n_fft_new,
+        if self.stft_mode == "fft" and audio.device.type != "privateuseone":
+            fft = torch.stft(
+                audio,
+                n_fft=n_fft_new,
                 hop_length=hop_length_new,
                 win_length=win_length_new,
-                window="hann",
-            ).to(audio.device)
-        magnitude = self.stft.transform(audio)  # phase
+                window=self.hann_window[keyshift_key],
+                center=True,
+                pad_mode="reflect",
+                return_complex=True,
+            )
+            magnitude = fft.abs()
+        else:
+            # One conv STFT per (keyshift, speed, device), not just the first one seen
+            stft_key = (n_fft_new, hop_length_new, win_length_new, str(audio.device))
+            if stft_key not in self.stft_cache:
+                self.stft_cache[stft_key] = STFT(
+                    filter_length=n_fft_new,
+                    hop_length=hop_length_new,
+                    win_length=win_length_new,
+                    window="hann",
+                ).to(audio.device)
+            magnitude = self.stft_cache[stft_key].transform(audio)  # phase
         # if (audio.device.type == "privateuseone"):
         #     magnitude=magnitude.to(audio.device)
         if keyshift != 0:
@@ -562,8 +579,56 @@ class MelSpectrogram(torch.nn.Module):
         return log_mel_spec
 
 
+ONNX_OPT_LEVELS = {
+    "disable": "ORT_DISABLE_ALL",
+    "basic": "ORT_ENABLE_BASIC",
+    "extended": "ORT_ENABLE_EXTENDED",
+    "all": "ORT_ENABLE_ALL",
+}
+
+
+def create_onnx_session(onnx_path, device="cpu", threads=None, opt_level="all"):
+    """ONNX Runtime session for the exported E2E model.
+
+    threads sets intra-op parallelism (None/0 lets ORT use all cores).
+    """
+    import onnxruntime as ort
+
+    device = str(device)
+    if device.startswith("cuda"):
+        providers = ["CUDAExecutionProvider", "CPUExecutionProvider"]
+    elif device.startswith("privateuseone") or device.startswith("dml"):
+        providers = ["DmlExecutionProvider", "CPUExecutionProvider"]
+    else:
+        providers = ["CPUExecutionProvider"]
+    options = ort.SessionOptions()
+    options.graph_optimization_level = getattr(
+        ort.GraphOptimizationLevel, ONNX_OPT_LEVELS[opt_level]
+    )
+    options.intra_op_num_threads = threads or 0
+    options.inter_op_num_threads = 1
+    options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+    return ort.InferenceSession(onnx_path, sess_options=options, providers=providers)
+
+
 class RMVPE:
-    def __init__(self, model_path, is_half, onnx, device=None):
+    def __init__(
+        self,
+        model_path,
+        is_half,
+        onnx,
+        device=None,
+        quantize=False,
+        stft_mode="fft",
+        segment_frames=3200,
+        context_frames=128,
+        onnx_threads=None,
+        onnx_opt_level="all",
+    ):
+        # Long inputs run through E2E in segments of segment_frames (10ms frames)
+        # with context_frames of real audio on each side; 0/None = single pass
+        self.segment_frames = segment_frames
+        self.context_frames = context_frames
         self.resample_kernel = {}
         self.resample_kernel = {}
         self.is_half = is_half
@@ -572,21 +637,27 @@ class RMVPE:
             device = "cuda" if torch.cuda.is_available() else "cpu"
         self.device = device
         self.mel_extractor = MelSpectrogram(
-            is_half, 128, 16000, 1024, 160, None, 30, 8000
+            is_half, 128, 16000, 1024, 160, None, 30, 8000, stft_mode=stft_mode
         ).to(device)
         if onnx:
-            import onnxruntime as ort
-
-            ort_session = ort.InferenceSession(
-                "rmvpe.onnx", providers=["DmlExecutionProvider"]
+            onnx_path = (
+                model_path
+                if model_path.endswith(".onnx")
+                else os.path.splitext(model_path)[0] + ".onnx"
+            )
+            self.model = create_onnx_session(
+                onnx_path, device, onnx_threads, onnx_opt_level
             )
-            self.model = ort_session
         else:
             model = E2E(4, 1, (2, 2))
             ckpt = torch.load(model_path, map_location="cpu")
             model.load_state_dict(ckpt)
             model.eval()
-            if is_half == True:
+            if quantize and str(device) == "cpu" and not is_half:
+                from quantize import quantize_rmvpe
+
+                model = quantize_rmvpe(model)
+            elif is_half == True:
                 model = model.half()
             self.model = model
             self.model = self.model.to(device)
@@ -605,7 +676,7 @@ class RMVPE:
                 onnx_outputs_names = self.model.get_outputs()[0].name
                 hidden = self.model.run(
                     [onnx_outputs_names],
-                    input_feed={onnx_input_name: mel.cpu().numpy()},
+                    input_feed={onnx_input_name: mel.float().cpu().numpy()},
                 )[0]
             else:
                 hidden = self.model(mel)
@@ -618,40 +689,72 @@ class RMVPE:
         # f0 = np.array([10 * (2 ** (cent_pred / 1200)) if cent_pred else 0 for cent_pred in cents_pred])
         return f0
 
-    def infer_from_audio(self, audio, thred=0.03):
-        # torch.cuda.synchronize()
-        t0 = ttime()
+    def audio2hidden(self, audio):
         mel = self.mel_extractor(
             torch.from_numpy(audio).float().to(self.device).unsqueeze(0), center=True
         )
-        # print(123123123,mel.device.type)
-        # torch.cuda.synchronize()
-        t1 = ttime()
         hidden = self.mel2hidden(mel)
-        # torch.cuda.synchronize()
-        t2 = ttime()
-        # print(234234,hidden.device.type)
         if not self.onnx:
             hidden = hidden.squeeze(0).cpu().numpy()
         else:
             hidden = hidden[0]
         if self.is_half == True:
             hidden = hidden.astype("float32")
-
-        f0 = self.decode(hidden, thred=thred)
-        # torch.cuda.synchronize()
-        t3 = ttime()
-        # print("hmvpe:%s\t%s\t%s\t%s"%(t1-t0,t2-t1,t3-t2,t3-t0))
+        return hidden
+
+    def infer_f0(self, audio, thred=0.03):
+        hop = self.mel_extractor.hop_length
+        n_frames = len(audio) // hop + 1
+        if (
+            not self.segment_frames
+            or n_frames <= self.segment_frames + 2 * self.context_frames
+        ):
+            return self.decode(self.audio2hidden(audio), thred=thred)
+        # Segment audio starts on a hop boundary, so its mel frame 0 is global
+        # frame ctx_start; frames within n_fft/2 of a cut only appear in context
+        f0 = np.zeros(n_frames)
+        for start in range(0, n_frames, self.segment_frames):
+            end = min(start + self.segment_frames, n_frames)
+            ctx_start = max(0, start - self.context_frames)
+            ctx_end = min(n_frames, end + self.context_frames)
+            hidden = self.audio2hidden(audio[ctx_start * hop : ctx_end * hop])
+            f0[start:end] = self.decode(
+                hidden[start - ctx_start : end - ctx_start], thred=thred
+            )
         return f0
+
+    def infer_from_audio(self, audio, thred=0.03):
+        return self.infer_f0(audio, thred=thred)
+
+    def check_segments(self, audio, thred=0.03, min_voicing=0.995, max_rms_cents=5.0):
+        """Segmented vs single-pass f0 on audio; AssertionError past the tolerance.
+
+        Tolerance: voicing decisions agree on at least min_voicing of the
+        frames and the RMS deviation over frames voiced in both passes is at
+        most max_rms_cents. Returns (segmented f0, voicing, rms cents, max cents).
+        """
+        segment_frames = self.segment_frames
+        try:
+            segmented = self.infer_f0(audio, thred=thred)
+            self.segment_frames = None
+            full = self.infer_f0(audio, thred=thred)
+        finally:
+            self.segment_frames = segment_frames
+        assert len(segmented) == len(full), (len(segmented), len(full))
+        voicing = float(np.mean((segmented > 0) == (full > 0)))
+        both = (segmented > 0) & (full > 0)
+        cents = 1200 * np.log2(segmented[both] / full[both]) if both.any() else np.zeros(1)
+        rms_cents = float(np.sqrt(np.mean(np.square(cents))))
+        max_cents = float(np.abs(cents).max())
+        assert voicing >= min_voicing and rms_cents <= max_rms_cents, (
+            "segmented RMVPE (%s frames, %s context) drifts from the single pass: "
+            "voicing %.4f < %.4f or rms %.2f > %.2f cents"
+            % (segment_frames, self.context_frames, voicing, min_voicing, rms_cents, max_rms_cents)
+        )
+        return segmented, voicing, rms_cents, max_cents
     
     def infer_from_audio_with_pitch(self, audio, thred=0.03, f0_min=50, f0_max=1100):
-        audio = torch.from_numpy(audio).float().to(self.device).unsqueeze(0)
-        mel = self.mel_extractor(audio, center=True)
-        hidden = self.mel2hidden(mel)
-        hidden = hidden.squeeze(0).cpu().numpy()
-        if self.is_half == True:
-            hidden = hidden.astype("float32")
-        f0 = self.decode(hidden, thred=thred)
+        f0 = self.infer_f0(audio, thred=thred)
         f0[(f0 < f0_min) | (f0 > f0_max)] = 0  
         return f0
 
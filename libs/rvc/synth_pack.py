@@ -0,0 +1,107 @@
+"""
+Synthesizer loading and the "inference pack" export.
+
+A raw RVC .pth carries the training layout: weight-norm g/v pairs that are
+recombined on every forward pass and the enc_q posterior encoder, which
+inference never runs. An inference pack stores the folded weights only:
+
+python libs/rvc/synth_pack.py model.pth model.infer.pth [--half]
+
+load_synthesizer() accepts both formats and always returns a folded model.
+"""
+import os, sys
+import argparse
+
+import torch
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from infer_pack.models import (
+    SynthesizerTrnMs256NSFsid,
+    SynthesizerTrnMs256NSFsid_nono,
+    SynthesizerTrnMs768NSFsid,
+    SynthesizerTrnMs768NSFsid_nono,
+)
+
+PACK_FORMAT = "rvc-inference-pack-1"
+
+
+def build_synthesizer(cpt, is_half):
+    """Instantiate the synthesizer class matching a checkpoint, without enc_q."""
+    cpt["config"][-3] = cpt["weight"]["emb_g.weight"].shape[0]  # n_spk
+    if_f0 = cpt.get("f0", 1)
+    version = cpt.get("version", "v1")
+    if version == "v1":
+        if if_f0 == 1:
+            net_g = SynthesizerTrnMs256NSFsid(*cpt["config"], is_half=is_half)
+        else:
+            net_g = SynthesizerTrnMs256NSFsid_nono(*cpt["config"])
+    elif version == "v2":
+        if if_f0 == 1:
+            net_g = SynthesizerTrnMs768NSFsid(*cpt["config"], is_half=is_half)
+        else:
+            net_g = SynthesizerTrnMs768NSFsid_nono(*cpt["config"])
+    del net_g.enc_q
+    return net_g
+
+
+def fold_weight_norm(net_g):
+    """Bake weight_g * weight_v / ||weight_v|| into plain weights (dec and flow)."""
+    net_g.remove_weight_norm()
+    return net_g
+
+
+def load_synthesizer(model_path, device, is_half, dtype=None):
+    """Load a raw .pth or an inference pack. Returns (net_g, cpt).
+
+    dtype overrides is_half for the weights (e.g. torch.bfloat16 on CPU).
+    """
+    cpt = torch.load(model_path, map_location="cpu")
+    net_g = build_synthesizer(cpt, is_half)
+    if cpt.get("format") == PACK_FORMAT:
+        fold_weight_norm(net_g)
+        net_g.load_state_dict(cpt["weight"], strict=True)
+    else:
+        print(net_g.load_state_dict(cpt["weight"], strict=False))  # 不加这一行清不干净，真奇葩
+        fold_weight_norm(net_g)
+    net_g.eval().to(device)
+    if dtype is None:
+        dtype = torch.float16 if is_half else torch.float32
+    net_g = net_g.to(dtype)
+    return net_g, cpt
+
+
+def pack_synthesizer(model_path, out_path, half=False):
+    net_g, cpt = load_synthesizer(model_path, "cpu", is_half=False)
+    weight = {
+        k: (v.half() if half and v.is_floating_point() else v).contiguous()
+        for k, v in net_g.state_dict().items()
+    }
+    packed = {
+        "format": PACK_FORMAT,
+        "weight": weight,
+        "config": cpt["config"],
+        "f0": cpt.get("f0", 1),
+        "version": cpt.get("version", "v1"),
+        "info": cpt.get("info", ""),
+    }
+    torch.save(packed, out_path)
+    print(
+        "packed %s -> %s (%.1f MB -> %.1f MB)"
+        % (
+            model_path,
+            out_path,
+            os.path.getsize(model_path) / 2**20,
+            os.path.getsize(out_path) / 2**20,
+        )
+    )
+    return out_path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export an RVC model for inference")
+    parser.add_argument("model_path")
+    parser.add_argument("out_path")
+    parser.add_argument("--half", action="store_true", help="store weights in fp16")
+    args = parser.parse_args()
+    pack_synthesizer(args.model_path, args.out_path, args.half)
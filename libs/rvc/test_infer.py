@@ -12,181 +12,50 @@ import argparse
 import glob
 import sys
 import torch
-from multiprocessing import cpu_count
-
-
-sys.stdout = open(sys.stdout.fileno(), mode='w', encoding='utf-8', buffering=1)
-class Config:
-    def __init__(self,device,is_half):
-        self.device = device
-        self.is_half = is_half
-        self.n_cpu = 0
-        self.gpu_name = None
-        self.gpu_mem = None
-        self.x_pad, self.x_query, self.x_center, self.x_max = self.device_config()
-
-    def device_config(self) -> tuple:
-        if torch.cuda.is_available():
-            i_device = int(self.device.split(":")[-1])
-            self.gpu_name = torch.cuda.get_device_name(i_device)
-            if (
-                ("16" in self.gpu_name and "V100" not in self.gpu_name.upper())
-                or "P40" in self.gpu_name.upper()
-                or "1060" in self.gpu_name
-                or "1070" in self.gpu_name
-                or "1080" in self.gpu_name
-            ):
-                print("16系/10系显卡和P40强制单精度")
-                self.is_half = False
-                for config_file in ["32k.json", "40k.json", "48k.json"]:
-                    with open(f"configs/{config_file}", "r") as f:
-                        strr = f.read().replace("true", "false")
-                    with open(f"configs/{config_file}", "w") as f:
-                        f.write(strr)
-                with open("trainset_preprocess_pipeline_print.py", "r") as f:
-                    strr = f.read().replace("3.7", "3.0")
-                with open("trainset_preprocess_pipeline_print.py", "w") as f:
-                    f.write(strr)
-            else:
-                self.gpu_name = None
-            self.gpu_mem = int(
-                torch.cuda.get_device_properties(i_device).total_memory
-                / 1024
-                / 1024
-                / 1024
-                + 0.4
-            )
-            if self.gpu_mem <= 4:
-                with open("trainset_preprocess_pipeline_print.py", "r") as f:
-                    strr = f.read().replace("3.7", "3.0")
-                with open("trainset_preprocess_pipeline_print.py", "w") as f:
-                    f.write(strr)
-        elif torch.backends.mps.is_available():
-            print("没有发现支持的N卡, 使用MPS进行推理")
-            self.device = "mps"
-        else:
-            print("没有发现支持的N卡, 使用CPU进行推理")
-            self.device = "cpu"
-            self.is_half = True
-
-        if self.n_cpu == 0:
-            self.n_cpu = cpu_count()
-
-        if self.is_half:
-            # 6G显存配置
-            x_pad = 3
-            x_query = 10
-            x_center = 60
-            x_max = 65
-        else:
-            # 5G显存配置
-            x_pad = 1
-            x_query = 6
-            x_center = 38
-            x_max = 41
-
-        if self.gpu_mem != None and self.gpu_mem <= 4:
-            x_pad = 1
-            x_query = 5
-            x_center = 30
-            x_max = 32
-
-        return x_pad, x_query, x_center, x_max
-
-f0up_key=sys.argv[1]
-input_path=sys.argv[2]
-index_path=sys.argv[3]
-f0method=sys.argv[4]#harvest or pm
-opt_path=sys.argv[5]
-model_path=sys.argv[6]
-index_rate=float(sys.argv[7])
-device=sys.argv[8]
-is_half=bool(sys.argv[9])
-filter_radius=int(sys.argv[10])
-resample_sr=int(sys.argv[11])
-rms_mix_rate=float(sys.argv[12])
-protect=float(sys.argv[13])
-crepe_hop_length = int(sys.argv[14])
-f0_minimum = int(sys.argv[15])
-f0_maximum = int(sys.argv[16])
-autotune_enable = str(sys.argv[17])
-rmvpe_onxx = "rvc_models/rmvpe.onnx"
-print(sys.argv)
-config=Config(device,is_half)
-now_dir=os.getcwd()
-sys.path.append(now_dir)
-from vc_infer_pipeline import VC
-from infer_pack.models import (
-    SynthesizerTrnMs256NSFsid,
-    SynthesizerTrnMs256NSFsid_nono,
-    SynthesizerTrnMs768NSFsid,
-    SynthesizerTrnMs768NSFsid_nono,
-)
-from my_utils import load_audio
-from fairseq import checkpoint_utils
-from scipy.io import wavfile
-import rmvpe
-
-if(autotune_enable == "false"):
-    autotune_enable = False
-else:
-    autotune_enable = True 
-
-print("Autotune" , autotune_enable)
-
-hubert_model=None
-def load_hubert():
-    global hubert_model
-    models, saved_cfg, task = checkpoint_utils.load_model_ensemble_and_task(["rvc_models/hubert_base.pt"],suffix="",)
-    hubert_model = models[0]
-    hubert_model = hubert_model.to(device)
-    if(is_half):hubert_model = hubert_model.half()
-    else:hubert_model = hubert_model.float()
-    hubert_model.eval()
-
-def vc_single(sid,input_audio,f0_up_key,f0_file,f0_method,file_index,index_rate):
-    global tgt_sr,net_g,vc,hubert_model,version
-    if input_audio is None:return "You need to upload an audio", None
-    f0_up_key = int(f0_up_key)
-    audio=load_audio(input_audio,16000)
-    times = [0, 0, 0]
-    if(hubert_model==None):load_hubert()
-    if_f0 = cpt.get("f0", 1)
-    # audio_opt=vc.pipeline(hubert_model,net_g,sid,audio,times,f0_up_key,f0_method,file_index,file_big_npy,index_rate,if_f0,f0_file=f0_file)
-    audio_opt=vc.pipeline(hubert_model,net_g,sid,audio,input_audio,times,f0_up_key,f0_method,file_index,index_rate,if_f0,filter_radius,tgt_sr,resample_sr,rms_mix_rate,version,protect,crepe_hop_length,f0_autotune=autotune_enable,rmvpe_onnx=False,f0_file=f0_file,f0_max=f0_maximum,f0_min=f0_minimum)
-    print(times)
-    return audio_opt
-
-
-def get_vc(model_path):
-    global n_spk,tgt_sr,net_g,vc,cpt,device,is_half,version
-    print("loading pth %s"%model_path)
-    cpt = torch.load(model_path, map_location="cpu")
-    tgt_sr = cpt["config"][-1]
-    cpt["config"][-3]=cpt["weight"]["emb_g.weight"].shape[0]#n_spk
-    if_f0=cpt.get("f0",1)
-    version = cpt.get("version", "v1")
-    if version == "v1":
-        if if_f0 == 1:
-            net_g = SynthesizerTrnMs256NSFsid(*cpt["config"], is_half=is_half)
-        else:
-            net_g = SynthesizerTrnMs256NSFsid_nono(*cpt["config"])
-    elif version == "v2":
-        if if_f0 == 1:#
-            net_g = SynthesizerTrnMs768NSFsid(*cpt["config"], is_half=is_half)
-        else:
-            net_g = SynthesizerTrnMs768NSFsid_nono(*cpt["config"])
-    del net_g.enc_q
-    print(net_g.load_state_dict(cpt["weight"], strict=False))  # 不加这一行清不干净，真奇葩
-    net_g.eval().to(device)
-    if (is_half):net_g = net_g.half()
-    else:net_g = net_g.float()
-    vc = VC(tgt_sr, config)
-    n_spk=cpt["config"][-3]
-    # return {"visible": True,"maximum": n_spk, "__type__": "update"}
-
-
-get_vc(model_path)
-wav_opt=vc_single(0,input_path,f0up_key,None,f0method,index_path,index_rate)
-wavfile.write(opt_path, tgt_sr, wav_opt)
-
+from config import Config
+
+
+# guarded: spawned worker processes (world_f0) import this file as __mp_main__
+if __name__ == "__main__":
+    sys.stdout = open(sys.stdout.fileno(), mode='w', encoding='utf-8', buffering=1)
+    f0up_key=sys.argv[1]
+    input_path=sys.argv[2]
+    index_path=sys.argv[3]
+    f0method=sys.argv[4]#harvest or pm
+    opt_path=sys.argv[5]
+    model_path=sys.argv[6]
+    index_rate=float(sys.argv[7])
+    device=sys.argv[8]
+    is_half=sys.argv[9].lower() == "true"
+    filter_radius=int(sys.argv[10])
+    resample_sr=int(sys.argv[11])
+    rms_mix_rate=float(sys.argv[12])
+    protect=float(sys.argv[13])
+    crepe_hop_length = int(sys.argv[14])
+    f0_minimum = int(sys.argv[15])
+    f0_maximum = int(sys.argv[16])
+    autotune_enable = str(sys.argv[17])
+    backend = sys.argv[18] if len(sys.argv) > 18 else "torch"  # torch or onnx
+    quantize_int8 = len(sys.argv) > 19 and sys.argv[19].lower() == "true"
+    precision = sys.argv[20] if len(sys.argv) > 20 and sys.argv[20] != "auto" else None  # fp16, bf16 or fp32
+    bitrate = sys.argv[21] if len(sys.argv) > 21 and sys.argv[21] != "auto" else None  # e.g. 96k, lossy formats
+    rmvpe_onxx = "rvc_models/rmvpe.onnx"
+    print(sys.argv)
+    config=Config(device,is_half,backend,quantize_int8,precision,rmvpe_onnx_path=rmvpe_onxx)
+    device, is_half = config.device, config.is_half
+    now_dir=os.getcwd()
+    sys.path.append(now_dir)
+    from model_pool import ModelPool
+    from audio_io import write_audio
+
+    if(autotune_enable == "false"):
+        autotune_enable = False
+    else:
+        autotune_enable = True 
+
+    print("Autotune" , autotune_enable)
+
+    # a one-voice pool: same loading code as the batch runner (model_pool.py)
+    pool = ModelPool(config, max_models=1)
+    tgt_sr, wav_opt = pool.convert(model_path, index_path, input_path, f0up_key, f0method, index_rate, filter_radius, resample_sr, rms_mix_rate, protect, crepe_hop_length, f0_minimum, f0_maximum, autotune_enable)
+    write_audio(opt_path, wav_opt, tgt_sr, bitrate=bitrate)  # wav/flac/ogg/opus/mp3 by extension
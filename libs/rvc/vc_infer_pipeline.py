@@ -6,19 +6,22 @@ from torch import Tensor
 import scipy.signal as signal
 import pyworld, os, traceback, faiss, librosa, torchcrepe
 from scipy import signal
-from functools import lru_cache
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
+import threading
 
 from functools import partial
 import re
 
 from tqdm import tqdm
 
-import random
 
 now_dir = os.getcwd()
 sys.path.append(now_dir)
 
 from LazyImport import lazyload
+from world_f0 import segmented_world_f0
 
 torchcrepe = lazyload("torchcrepe")  # Fork Feature. Crepe algo for training and preprocess
 torch = lazyload("torch")
@@ -26,21 +29,57 @@ rmvpe = lazyload("rmvpe")
 
 bh, ah = signal.butter(N=5, Wn=48, btype="high", fs=16000)
 
-input_audio_path2wav = {}
+# hybrid f0 runs "rmvpe" and "rmvpe+" in parallel threads; load the model once
+rmvpe_lock = threading.Lock()
+
+class F0Cache(object):
+    """Bounded LRU cache of unshifted f0 curves.
+
+    Entries are keyed on the audio content (not its path) together with every
+    extraction parameter, so the same line converted with another pitch shift
+    or with autotune toggled reuses the curve instead of re-extracting it.
+    """
+
+    def __init__(self, max_entries=32, max_bytes=256 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(x, f0_method, f0_min, f0_max, p_len, *extra):
+        digest = hashlib.sha1(np.ascontiguousarray(x).view(np.uint8)).hexdigest()
+        return (digest, x.dtype.str, x.shape[0], f0_method, f0_min, f0_max, p_len) + extra
+
+    def get(self, key):
+        f0 = self.entries.get(key)
+        if f0 is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return f0.copy()
+
+    def put(self, key, f0):
+        f0 = np.array(f0, dtype=np.float64)
+        if key in self.entries:
+            self.nbytes -= self.entries.pop(key).nbytes
+        self.entries[key] = f0
+        self.nbytes += f0.nbytes
+        while self.entries and (
+            len(self.entries) > self.max_entries or self.nbytes > self.max_bytes
+        ):
+            _, evicted = self.entries.popitem(last=False)
+            self.nbytes -= evicted.nbytes
+
+    def clear(self):
+        self.entries.clear()
+        self.nbytes = 0
 
 
-@lru_cache
-def cache_harvest_f0(input_audio_path, fs, f0max, f0min, frame_period):
-    audio = input_audio_path2wav[input_audio_path]
-    f0, t = pyworld.harvest(
-        audio,
-        fs=fs,
-        f0_ceil=f0max,
-        f0_floor=f0min,
-        frame_period=frame_period,
-    )
-    f0 = pyworld.stonemask(audio, f0, t, fs)
-    return f0
+f0_cache = F0Cache()
 
 
 def change_rms(data1, sr1, data2, sr2, rate):  # 1是输入音频，2是输出音频,rate是2的占比
@@ -84,12 +123,13 @@ class VC(object):
         self.t_center = self.sr * self.x_center  # 查询切点位置
         self.t_max = self.sr * self.x_max  # 免查询时长阈值
         self.device = config.device
+        self.n_cpu = getattr(config, "n_cpu", 0) or None
         self.f0_method_dict = {
             "pm": self.get_pm,
             "harvest": self.get_harvest,
             "dio": self.get_dio,
             "rmvpe": self.get_rmvpe,
-            "rmvpe_onnx": self.get_rmvpe,
+            "rmvpe_onnx": partial(self.get_rmvpe, use_onnx=True),
             "rmvpe+": self.get_pitch_dependant_rmvpe,
             "crepe": self.get_f0_official_crepe_computation,
             "crepe-tiny": partial(self.get_f0_official_crepe_computation, model='model'),
@@ -111,7 +151,33 @@ class VC(object):
             2093.00, 2217.46, 2349.32, 2489.02, 2637.02, 2793.83,
             2959.96, 3135.96, 3322.44, 3520.00, 3729.31, 3951.07
         ]
-        self.onnx = False
+        self.onnx = getattr(config, "backend", "torch") == "onnx"
+        self.rmvpe_path = getattr(config, "rmvpe_path", "rvc_models/rmvpe.pt")
+        self.rmvpe_onnx_path = getattr(config, "rmvpe_onnx_path", "rvc_models/rmvpe.onnx")
+        self.onnx_threads = getattr(config, "onnx_threads", None)
+        self.onnx_opt_level = getattr(config, "onnx_opt_level", "all")
+        self.rmvpe_models = {}
+        # Left context frames encoded but not vocoded (net_g.infer rate); the
+        # last vocode_pad seconds of it are still vocoded to warm up flow/dec
+        vocode_pad = getattr(config, "vocode_pad", None)
+        self.t_skip = 0
+        if vocode_pad is not None and not self.onnx:
+            self.t_skip = max(0, int(self.t_pad - self.sr * vocode_pad)) // self.window
+        self.tgt_sr = tgt_sr
+        # Inputs that fit one chunk are padded by short_pad seconds only
+        # (None pads them by x_pad like the chunked path)
+        short_pad = getattr(config, "short_pad", None)
+        self.t_pad_short = None
+        if short_pad is not None:
+            self.t_pad_short = int(self.sr * short_pad) // self.window * self.window
+        self.stitch_stats = {"vocoded": 0, "output": 0}
+        # file_index -> (mtime, index, big_npy); may be shared between VCs
+        self.index_cache = {}
+        self.f0_cache = f0_cache
+        self.quantize = getattr(config, "quantize", False)
+        self.dtype = getattr(
+            config, "dtype", torch.float16 if self.is_half else torch.float32
+        )
 
     # Fork Feature: Get the best torch device to use for f0 algorithms that require a torch device. Will return the type (torch.device)
     def get_optimal_torch_device(self, index: int = 0) -> torch.device:
@@ -221,46 +287,64 @@ class VC(object):
         )
 
     def get_harvest(self, x, *args, **kwargs):
-        f0_spectral = pyworld.harvest(
-            x.astype(np.double),
-            fs=self.sr,
-            f0_ceil=kwargs.get('f0_max'),
-            f0_floor=kwargs.get('f0_min'),
+        return segmented_world_f0(
+            x,
+            self.sr,
+            method="harvest",
+            f0_min=kwargs.get('f0_min'),
+            f0_max=kwargs.get('f0_max'),
             frame_period=1000 * kwargs.get('hop_length', 160) / self.sr,
+            n_workers=self.n_cpu,
         )
-        return pyworld.stonemask(x.astype(np.double), *f0_spectral, self.sr)
 
     def get_dio(self, x, *args, **kwargs):
-        f0_spectral = pyworld.dio(
-            x.astype(np.double),
-            fs=self.sr,
-            f0_ceil=kwargs.get('f0_max'),
-            f0_floor=kwargs.get('f0_min'),
+        return segmented_world_f0(
+            x,
+            self.sr,
+            method="dio",
+            f0_min=kwargs.get('f0_min'),
+            f0_max=kwargs.get('f0_max'),
             frame_period=1000 * kwargs.get('hop_length', 160) / self.sr,
+            n_workers=self.n_cpu,
         )
-        return pyworld.stonemask(x.astype(np.double), *f0_spectral, self.sr)
 
 
-    def get_rmvpe(self, x, *args, **kwargs):
-        self.model_rmvpe = rmvpe.RMVPE("rvc_models/rmvpe.pt", is_half=self.is_half, device=self.device, onnx=self.onnx)
+    def load_rmvpe(self, use_onnx):
+        # Sessions/models are reused across calls; building an ORT session or
+        # loading the checkpoint costs more than inferring a short line
+        with rmvpe_lock:
+            if use_onnx not in self.rmvpe_models:
+                self.rmvpe_models[use_onnx] = rmvpe.RMVPE(
+                    self.rmvpe_onnx_path if use_onnx else self.rmvpe_path,
+                    is_half=self.is_half,
+                    device=self.device,
+                    onnx=use_onnx,
+                    quantize=self.quantize,
+                    onnx_threads=self.onnx_threads,
+                    onnx_opt_level=self.onnx_opt_level,
+                )
+            return self.rmvpe_models[use_onnx]
+
+    def get_rmvpe(self, x, *args, use_onnx=None, **kwargs):
+        use_onnx = self.onnx if use_onnx is None else use_onnx
+        self.model_rmvpe = self.load_rmvpe(use_onnx)
         f0 = self.model_rmvpe.infer_from_audio(x, thred=0.03)
         if "privateuseone" in str(self.device):
+                del self.rmvpe_models[use_onnx]
                 del self.model_rmvpe.model
                 del self.model_rmvpe
                 print("cleaning ortruntime memory")
         return f0
 
     def get_pitch_dependant_rmvpe(self, x, f0_min=1, f0_max=40000, *args, **kwargs):
-        self.model_rmvpe = rmvpe.RMVPE("rvc_models/rmvpe.pt", is_half=self.is_half, device=self.device, onnx=self.onnx)
+        self.model_rmvpe = self.load_rmvpe(self.onnx)
         # print("\n\n\n","Start",self.model_rmvpe)
         return self.model_rmvpe.infer_from_audio_with_pitch(x, thred=0.03, f0_min=f0_min, f0_max=f0_max)
 
     def autotune_f0(self, f0):
-        autotuned_f0 = []
-        for freq in f0:
-            closest_notes = [x for x in self.note_dict if abs(x - freq) == min(abs(n - freq) for n in self.note_dict)]
-            autotuned_f0.append(random.choice(closest_notes))
-        return np.array(autotuned_f0, np.float64)
+        notes = np.asarray(self.note_dict)
+        closest = np.abs(np.asarray(f0)[:, None] - notes[None, :]).argmin(axis=1)
+        return notes[closest].astype(np.float64)
     
     # Fork Feature: Acquire median hybrid f0 estimation calculation
     def get_f0_hybrid_computation(
@@ -280,28 +364,40 @@ class VC(object):
           'f0_max': f0_max, 'time_step': time_step, 'filter_radius': filter_radius, 
           'crepe_hop_length': crepe_hop_length, 'model': "full"
         }
-        methods_str = re.search('hybrid\[(.+)\]', methods_str)
-        if methods_str:  # Ensure a match was found
-            methods = [method.strip() for method in methods_str.group(1).split('+')]
-        f0_computation_stack = []
-
-        print(f"Calculating f0 pitch estimations for methods: {str(methods)}")
-        x = x.astype(np.float32)
-        x /= np.quantile(np.abs(x), 0.999)
-        # Get f0 calculations for all methods specified
-
+        match = re.search('hybrid\[(.+)\]', methods_str)
+        methods = []
+        if match:  # Ensure a match was found
+            methods = [method.strip() for method in match.group(1).split('+')]
         for method in methods:
             if method not in self.f0_method_dict:
                 print(f"Method {method} not found.")
-                continue
-            f0 = self.f0_method_dict[method](**params)
+        methods = [method for method in methods if method in self.f0_method_dict]
+        if not methods:
+            raise ValueError(f"No usable f0 methods in {methods_str}")
+
+        print(f"Calculating f0 pitch estimations for methods: {str(methods)}")
+
+        def compute(method):
+            t0 = ttime()
+            f0 = np.asarray(self.f0_method_dict[method](**params), dtype=np.float64)
             if method == 'harvest' and filter_radius > 2:
                 f0 = signal.medfilt(f0, 3)
-                f0 = f0[1:]  # Get rid of first frame.
-            f0_computation_stack.append(f0)
+            return f0, ttime() - t0
 
-        for fc in f0_computation_stack:
-            print(len(fc))
+        # pyworld, parselmouth and torch all release the GIL, so threads are enough
+        t0 = ttime()
+        with ThreadPoolExecutor(max_workers=len(methods)) as executor:
+            results = list(executor.map(compute, methods))
+        wall = ttime() - t0
+
+        # Every method is frame-aligned at t=0 with a 10ms hop; only the tail
+        # length differs, so crop/pad to p_len and let nanmedian skip the padding.
+        f0_computation_stack = np.full((len(methods), p_len), np.nan)
+        for row, (method, (f0, elapsed)) in enumerate(zip(methods, results)):
+            n = min(len(f0), p_len)
+            f0_computation_stack[row, :n] = f0[:n]
+            print(f"  {method}: {elapsed:.3f}s, {len(f0)} frames")
+        print(f"Hybrid f0 wall time: {wall:.3f}s")
 
         print(f"Calculating hybrid median f0 from the stack of: {str(methods)}")
         f0_median_hybrid = np.nanmedian(f0_computation_stack, axis=0)
@@ -322,7 +418,6 @@ class VC(object):
         f0_min=50,
         f0_max=1100,
     ):
-        global input_audio_path2wav
         time_step = self.window / self.sr * 1000
         f0_mel_min = 1127 * np.log(1 + f0_min / 700)
         f0_mel_max = 1127 * np.log(1 + f0_max / 700)
@@ -331,22 +426,29 @@ class VC(object):
           'crepe_hop_length': crepe_hop_length, 'model': "full", 'onnx': rmvpe_onnx
         }
 
-        if "hybrid" in f0_method:
-            # Perform hybrid median pitch estimation
-            input_audio_path2wav[input_audio_path] = x.astype(np.double)
-            f0 = self.get_f0_hybrid_computation(
-                f0_method,+
-                input_audio_path,
-                x,
-                f0_min,
-                f0_max,
-                p_len,
-                filter_radius,
-                crepe_hop_length,
-                time_step,
-            )
-        else:
-            f0 = self.f0_method_dict[f0_method](**params)
+        # The cache holds the unshifted curve, so the key leaves out f0_up_key/autotune
+        cache_key = self.f0_cache.make_key(
+            x, f0_method, f0_min, f0_max, p_len, filter_radius, crepe_hop_length, rmvpe_onnx
+        )
+        f0 = self.f0_cache.get(cache_key)
+        if f0 is None:
+            if "hybrid" in f0_method:
+                # Perform hybrid median pitch estimation
+                f0 = self.get_f0_hybrid_computation(
+                    f0_method,
+                    input_audio_path,
+                    x,
+                    f0_min,
+                    f0_max,
+                    p_len,
+                    filter_radius,
+                    crepe_hop_length,
+                    time_step,
+                )
+            else:
+                f0 = self.f0_method_dict[f0_method](**params)
+            self.f0_cache.put(cache_key, f0)
+            f0 = np.array(f0, dtype=np.float64)
 
         if f0_autotune:
             f0 = self.autotune_f0(f0)
@@ -390,12 +492,10 @@ class VC(object):
         index_rate,
         version,
         protect,
+        skip_head=0,
+        release=True,
     ):  # ,file_index,file_big_npy
-        feats = torch.from_numpy(audio0)
-        if self.is_half:
-            feats = feats.half()
-        else:
-            feats = feats.float()
+        feats = torch.from_numpy(audio0).to(self.dtype)
         if feats.dim() == 2:  # double channels
             feats = feats.mean(-1)
         assert feats.dim() == 1, feats.dim()
@@ -418,9 +518,8 @@ class VC(object):
             and isinstance(big_npy, type(None)) == False
             and index_rate != 0
         ):
-            npy = feats[0].cpu().numpy()
-            if self.is_half:
-                npy = npy.astype("float32")
+            # faiss and numpy work in fp32 whatever the model precision
+            npy = feats[0].float().cpu().numpy()
 
             # _, I = index.search(npy, 1)
             # npy = big_npy[I.squeeze()]
@@ -430,10 +529,8 @@ class VC(object):
             weight /= weight.sum(axis=1, keepdims=True)
             npy = np.sum(big_npy[ix] * np.expand_dims(weight, axis=2), axis=1)
 
-            if self.is_half:
-                npy = npy.astype("float16")
             feats = (
-                torch.from_numpy(npy).unsqueeze(0).to(self.device) * index_rate
+                torch.from_numpy(npy).unsqueeze(0).to(self.device, self.dtype) * index_rate
                 + (1 - index_rate) * feats
             )
 
@@ -458,20 +555,29 @@ class VC(object):
             feats = feats * pitchff + feats0 * (1 - pitchff)
             feats = feats.to(feats0.dtype)
         p_len = torch.tensor([p_len], device=self.device).long()
+        # synthesize only the last (frames - skip_head) frames; +0.5 keeps
+        # int(frames * rate) in infer() from rounding one frame short. The
+        # ONNX graph has no rate input: it vocodes everything and is trimmed here
+        infer_kwargs = {}
+        if skip_head and not self.onnx:
+            infer_kwargs["rate"] = (feats.shape[1] - skip_head + 0.5) / feats.shape[1]
         with torch.no_grad():
             if pitch != None and pitchf != None:
                 audio1 = (
-                    (net_g.infer(feats, p_len, pitch, pitchf, sid)[0][0, 0])
+                    (net_g.infer(feats, p_len, pitch, pitchf, sid, **infer_kwargs)[0][0, 0])
                     .data.cpu()
                     .float()
                     .numpy()
                 )
             else:
                 audio1 = (
-                    (net_g.infer(feats, p_len, sid)[0][0, 0]).data.cpu().float().numpy()
+                    (net_g.infer(feats, p_len, sid, **infer_kwargs)[0][0, 0]).data.cpu().float().numpy()
                 )
+        if skip_head and self.onnx:
+            audio1 = audio1[skip_head * self.tgt_sr // 100 :]
+        self.stitch_stats["vocoded"] += audio1.shape[0]
         del feats, p_len, padding_mask
-        if torch.cuda.is_available():
+        if release and torch.cuda.is_available():
             torch.cuda.empty_cache()
         t2 = ttime()
         times[0] += t1 - t0
@@ -511,33 +617,45 @@ class VC(object):
                 protect,
             )[t_pad_tgt : -t_pad_tgt]
 
-    def pipeline(self, model, net_g, sid, audio, input_audio_path, times, f0_up_key, f0_method,
-            file_index, index_rate, if_f0, filter_radius, tgt_sr, resample_sr, rms_mix_rate,
-            version, protect, crepe_hop_length, f0_autotune, rmvpe_onnx, f0_file=None, f0_min=50, f0_max=1100):
+    def load_index(self, file_index):
+        """(index, big_npy) for file_index, read once per file and mtime."""
+        if file_index == "":
+            print("File index was empty.")
+            return None, None
         try:
-            if file_index == "":
-                print("File index was empty.")
-                index = None
-                big_npy = None
-            else:
-                if os.path.exists(file_index):
-                    sys.stdout.write(f"Attempting to load {file_index}....\n")
-                    sys.stdout.flush()
-                else:
-                    sys.stdout.write(f"Attempting to load {file_index}.... (despite it not existing)\n")
-                    sys.stdout.flush()
-                index = faiss.read_index(file_index)
-                big_npy = index.reconstruct_n(0, index.ntotal)
+            mtime = os.path.getmtime(file_index)
+            cached = self.index_cache.get(file_index)
+            if cached is not None and cached[0] == mtime:
+                return cached[1], cached[2]
+            sys.stdout.write(f"Attempting to load {file_index}....\n")
+            sys.stdout.flush()
+            index = faiss.read_index(file_index)
+            big_npy = index.reconstruct_n(0, index.ntotal)
         except Exception:
             print("Could not open Faiss index file for reading.")
-            index = None
-            big_npy = None
+            return None, None
+        self.index_cache[file_index] = (mtime, index, big_npy)
+        return index, big_npy
+
+    def pipeline(self, model, net_g, sid, audio, input_audio_path, times, f0_up_key, f0_method,
+            file_index, index_rate, if_f0, filter_radius, tgt_sr, resample_sr, rms_mix_rate,
+            version, protect, crepe_hop_length, f0_autotune, rmvpe_onnx, f0_file=None, f0_min=50, f0_max=1100):
+        index, big_npy = self.load_index(file_index)
+        # per call: a pooled VC converts many lines
+        self.stitch_stats = {"vocoded": 0, "output": 0}
 
         audio = signal.filtfilt(bh, ah, audio)
-        audio_pad = np.pad(audio, (self.window // 2, self.window // 2), mode="reflect")
         opt_ts = []
-        
-        if audio_pad.shape[0] > self.t_max:
+        # one-chunk inputs: small pad, no cut search, no progress bar and no
+        # CUDA cache release (the f0 file offsets assume x_pad, keep it there)
+        short = (
+            self.t_pad_short is not None
+            and f0_file is None
+            and audio.shape[0] + self.window <= self.t_max
+        )
+
+        if audio.shape[0] + self.window > self.t_max:
+            audio_pad = np.pad(audio, (self.window // 2, self.window // 2), mode="reflect")
             audio_sum = np.zeros_like(audio)
             for i in range(self.window):
                 audio_sum += audio_pad[i : i - self.window]
@@ -547,11 +665,17 @@ class VC(object):
                 min_abs_audio_sum = abs_audio_sum.min()
                 opt_ts.append(t - self.t_query + np.where(abs_audio_sum == min_abs_audio_sum)[0][0])
 
+        if short:
+            t_pad, t_skip = self.t_pad_short, 0
+        else:
+            t_pad, t_skip = self.t_pad, self.t_skip
+        t_pad_tgt = t_pad // self.window * self.tgt_sr // 100
+
         s = 0
         audio_opt = []
         t = None
         t1 = ttime()
-        audio_pad = np.pad(audio, (self.t_pad, self.t_pad), mode="reflect")
+        audio_pad = np.pad(audio, (t_pad, t_pad), mode="reflect")
         p_len = audio_pad.shape[0] // self.window
         inp_f0 = None
 
@@ -578,25 +702,30 @@ class VC(object):
         t2 = ttime()
         times[1] += t2 - t1
 
-        with tqdm(total=len(opt_ts), desc="Processing", unit="window") as pbar:
-            for i, t in enumerate(opt_ts):
-                t = t // self.window * self.window
-                start = s
-                end = t + self.t_pad2 + self.window
-                audio_slice = audio_pad[start:end]
-                pitch_slice = pitch[:, start // self.window:end // self.window] if if_f0 else None
-                pitchf_slice = pitchf[:, start // self.window:end // self.window] if if_f0 else None
-                audio_opt.append(self.vc(model, net_g, sid, audio_slice, pitch_slice, pitchf_slice, times, index, big_npy, index_rate, version, protect)[self.t_pad_tgt : -self.t_pad_tgt])
-                s = t
-                pbar.update(1)
-                pbar.refresh()
+        # vc() output starts t_skip frames into the left context
+        trim = t_pad_tgt - t_skip * self.tgt_sr // 100
+        if opt_ts:
+            with tqdm(total=len(opt_ts), desc="Processing", unit="window") as pbar:
+                for i, t in enumerate(opt_ts):
+                    t = t // self.window * self.window
+                    start = s
+                    end = t + 2 * t_pad + self.window
+                    audio_slice = audio_pad[start:end]
+                    pitch_slice = pitch[:, start // self.window:end // self.window] if if_f0 else None
+                    pitchf_slice = pitchf[:, start // self.window:end // self.window] if if_f0 else None
+                    audio_opt.append(self.vc(model, net_g, sid, audio_slice, pitch_slice, pitchf_slice, times, index, big_npy, index_rate, version, protect, t_skip)[trim : -t_pad_tgt])
+                    s = t
+                    pbar.update(1)
+                    pbar.refresh()
 
         audio_slice = audio_pad[t:]
         pitch_slice = pitch[:, t // self.window:] if if_f0 and t is not None else pitch
         pitchf_slice = pitchf[:, t // self.window:] if if_f0 and t is not None else pitchf
-        audio_opt.append(self.vc(model, net_g, sid, audio_slice, pitch_slice, pitchf_slice, times, index, big_npy, index_rate, version, protect)[self.t_pad_tgt : -self.t_pad_tgt])
+        audio_opt.append(self.vc(model, net_g, sid, audio_slice, pitch_slice, pitchf_slice, times, index, big_npy, index_rate, version, protect, t_skip, not short)[trim : -t_pad_tgt])
         
         audio_opt = np.concatenate(audio_opt)
+        # vocoded/output ratio of this call, for callers that want it
+        self.stitch_stats["output"] += audio_opt.shape[0]
         if rms_mix_rate != 1:
             audio_opt = change_rms(audio, 16000, audio_opt, tgt_sr, rms_mix_rate)
         if resample_sr >= 16000 and tgt_sr != resample_sr:
@@ -606,7 +735,7 @@ class VC(object):
         audio_max = max(np.abs(audio_opt).max() / 0.99, 1)
         audio_opt = (audio_opt * max_int16 / audio_max).astype(np.int16)
 
-        if torch.cuda.is_available():
+        if not short and torch.cuda.is_available():
             torch.cuda.empty_cache()
 
         print("Returning completed audio...")
@@ -0,0 +1,162 @@
+"""Segmented, multi-process harvest/dio pitch extraction.
+
+pyworld runs harvest/dio + stonemask on one core over the whole signal, which
+is very slow for long inputs. Here the audio is split at low-energy frames,
+each segment is extracted with some overlapping context in a process pool and
+the per-segment curves are stitched back on the global frame grid.
+
+Only numpy and pyworld are imported so that spawned workers start quickly.
+The pool is created once per process with the spawn start method: callers
+run this from threads (hybrid f0) next to torch's own threads, where fork is
+unsafe, and spawn behaves the same on Linux and Windows.
+"""
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from time import time as ttime
+
+import numpy as np
+import pyworld
+
+
+def world_f0(x, fs, method="harvest", f0_min=50, f0_max=1100, frame_period=10.0):
+    """Single-pass harvest/dio followed by stonemask refinement."""
+    x = np.ascontiguousarray(x, dtype=np.double)
+    extract = pyworld.harvest if method == "harvest" else pyworld.dio
+    f0, t = extract(
+        x, fs=fs, f0_ceil=f0_max, f0_floor=f0_min, frame_period=frame_period
+    )
+    return pyworld.stonemask(x, f0, t, fs)
+
+
+_pool = None
+_pool_workers = None
+_pool_lock = threading.Lock()
+
+
+def get_pool(n_workers=None):
+    """The module's spawn-context process pool, rebuilt only when its size changes."""
+    global _pool, _pool_workers
+    n_workers = n_workers or os.cpu_count() or 1
+    with _pool_lock:
+        if _pool is None or _pool_workers != n_workers:
+            if _pool is not None:
+                _pool.shutdown(wait=True)
+            _pool = ProcessPoolExecutor(
+                max_workers=n_workers, mp_context=multiprocessing.get_context("spawn")
+            )
+            _pool_workers = n_workers
+        return _pool
+
+
+def _segment_worker(args):
+    x, fs, method, f0_min, f0_max, frame_period = args
+    return world_f0(x, fs, method, f0_min, f0_max, frame_period)
+
+
+def find_split_frames(x, hop, n_frames, segment_frames, search_frames):
+    """Pick segment boundaries (in frames) at the quietest frame near each target."""
+    n_hops = len(x) // hop
+    energy = np.square(x[: n_hops * hop].astype(np.float64)).reshape(n_hops, hop).sum(1)
+    bounds = [0]
+    target = segment_frames
+    while target < n_frames - segment_frames // 2:
+        lo = max(bounds[-1] + 1, target - search_frames)
+        hi = min(n_hops, target + search_frames)
+        if hi <= lo:
+            break
+        bounds.append(lo + int(np.argmin(energy[lo:hi])))
+        target = bounds[-1] + segment_frames
+    bounds.append(n_frames)
+    return bounds
+
+
+def check_continuity(left, right, tolerance_cents=50.0):
+    """Compare two curves computed over the same frames by neighbouring segments.
+
+    Returns (voicing agreement, median absolute deviation in cents over frames
+    voiced in both, ok flag).
+    """
+    voiced_left = left > 0
+    voiced_right = right > 0
+    if len(left) == 0:
+        return 1.0, 0.0, True
+    agreement = float(np.mean(voiced_left == voiced_right))
+    both = voiced_left & voiced_right
+    cents = 0.0
+    if both.any():
+        cents = float(np.median(np.abs(1200 * np.log2(left[both] / right[both]))))
+    return agreement, cents, agreement >= 0.9 and cents <= tolerance_cents
+
+
+def segmented_world_f0(
+    x,
+    fs,
+    method="harvest",
+    f0_min=50,
+    f0_max=1100,
+    frame_period=10.0,
+    n_workers=None,
+    segment_seconds=30.0,
+    overlap_seconds=1.0,
+    search_seconds=2.0,
+    verbose=True,
+):
+    """Drop-in replacement for world_f0 on long inputs.
+
+    The returned curve has exactly as many frames as the single-pass result.
+    Inputs shorter than two segments are processed in a single pass.
+    """
+    x = np.ascontiguousarray(x, dtype=np.double)
+    hop = int(round(fs * frame_period / 1000))
+    # Same frame count formula as GetSamplesForHarvest/GetSamplesForDIO
+    n_frames = int(1000.0 * len(x) / fs / frame_period) + 1
+    segment_frames = int(segment_seconds * 1000 / frame_period)
+    if n_frames < 2 * segment_frames or n_workers == 1:
+        return world_f0(x, fs, method, f0_min, f0_max, frame_period)
+
+    overlap = int(overlap_seconds * 1000 / frame_period)
+    bounds = find_split_frames(
+        x, hop, n_frames, segment_frames, int(search_seconds * 1000 / frame_period)
+    )
+
+    jobs = []
+    spans = []
+    for start, end in zip(bounds[:-1], bounds[1:]):
+        ctx_start = max(0, start - overlap)
+        ctx_end = min(n_frames, end + overlap)
+        # Segment audio starts on a hop boundary, so its frame 0 is global frame ctx_start
+        jobs.append(
+            (x[ctx_start * hop : ctx_end * hop], fs, method, f0_min, f0_max, frame_period)
+        )
+        spans.append((start, end, ctx_start, ctx_end))
+
+    t0 = ttime()
+    curves = list(get_pool(n_workers).map(_segment_worker, jobs))
+    elapsed = ttime() - t0
+
+    f0 = np.zeros(n_frames)
+    for i, ((start, end, ctx_start, _), curve) in enumerate(zip(spans, curves)):
+        piece = curve[start - ctx_start : end - ctx_start]
+        f0[start : start + len(piece)] = piece
+        if i == 0:
+            continue
+        # Frames around the boundary were seen by both neighbours
+        prev_start, prev_end, prev_ctx_start, _ = spans[i - 1]
+        lo = max(start - overlap // 2, ctx_start)
+        hi = min(start + overlap // 2, prev_end + overlap)
+        left = curves[i - 1][lo - prev_ctx_start : hi - prev_ctx_start]
+        right = curve[lo - ctx_start : hi - ctx_start]
+        n = min(len(left), len(right))
+        agreement, cents, ok = check_continuity(left[:n], right[:n])
+        if not ok and verbose:
+            print(
+                f"{method} f0 discontinuity at {start * frame_period / 1000:.2f}s: "
+                f"voicing agreement {agreement:.2f}, median deviation {cents:.1f} cents"
+            )
+    if verbose:
+        print(
+            f"{method} f0: {len(jobs)} segments on {n_workers or 'all'} workers in {elapsed:.2f}s"
+        )
+    return f0